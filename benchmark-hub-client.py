@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+import typing as tp
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sys import argv
+
+import requests
+from loguru import logger
+
+from feecc_spoke.HubClient import HubClient
+
+STAND_IN_HUB_ADDRESS: tp.Tuple[str, int] = ("127.0.0.1", 5050)
+HUB_LATENCY: float = 0.02  # seconds the stand-in hub takes to handle a request
+WORKBENCH_NO: int = 1
+
+
+class StandInHub(BaseHTTPRequestHandler):
+    """replies to the status and unit requests like the hub would, after a fixed delay"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, reply: tp.Dict[str, tp.Any]) -> None:
+        time.sleep(HUB_LATENCY)
+        body: bytes = json.dumps(reply).encode()
+        head: str = f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        self.wfile.write(head.encode() + body)
+
+    def do_GET(self) -> None:
+        self._reply({"employee_logged_in": False, "employee": None, "operation_ongoing": False})
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({"status": True, "comment": ""})
+
+    def log_message(self, *args: tp.Any) -> None:
+        pass
+
+
+class StandInHubServer(ThreadingHTTPServer):
+    request_queue_size = 64  # the default backlog of 5 drops connections of a large fan-out
+
+
+def measure(name: str, rounds: int, action: tp.Callable[[], tp.Any]) -> None:
+    """print the average time the action takes"""
+    started_at: float = time.monotonic()
+    for _ in range(rounds):
+        action()
+    took: float = (time.monotonic() - started_at) / rounds
+    print(f"{name:<48} {took * 1000:8.1f} ms")
+
+
+def benchmark(rounds: int) -> None:
+    """compare one request per connection, pooled sequential requests and a concurrent fan-out"""
+    hub_url: str = "http://{}:{}".format(*STAND_IN_HUB_ADDRESS)
+    client = HubClient(hub_url, WORKBENCH_NO)
+    status_url: str = hub_url + client.url("status")
+    end_url: str = hub_url + client.url("end", "1")
+    payload: tp.Dict[str, tp.Any] = {"workbench_no": WORKBENCH_NO, "additional_info": {}}
+    client.request("status")  # warm the pool up
+
+    print(f"stand-in hub latency: {HUB_LATENCY * 1000:.0f} ms, {rounds} rounds")
+    measure("status, new connection per request", rounds, lambda: requests.get(status_url, timeout=1).json())
+    measure("status, pooled client", rounds, lambda: client.request("status"))
+    measure(
+        "status + end, new connection per request",
+        rounds,
+        lambda: (requests.get(status_url, timeout=1).json(), requests.post(end_url, json=payload, timeout=1).json()),
+    )
+    measure(
+        "status + end, pooled client, one by one",
+        rounds,
+        lambda: (client.request("status"), client.request("end", payload, "1")),
+    )
+    measure(
+        "status + end, pooled client, concurrently",
+        rounds,
+        lambda: client.gather(client.fetch("status"), client.fetch("end", payload, "1")),
+    )
+    measure(
+        "16 status requests, pooled client, one by one", rounds, lambda: [client.request("status") for _ in range(16)]
+    )
+    measure(
+        "16 status requests, pooled client, concurrently",
+        rounds,
+        lambda: client.gather(*(client.fetch("status") for _ in range(16))),
+    )
+
+
+if __name__ == "__main__":
+    logger.remove()
+    server = StandInHubServer(STAND_IN_HUB_ADDRESS, StandInHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    benchmark(int(argv[1]) if len(argv) > 1 else 20)
+    server.shutdown()
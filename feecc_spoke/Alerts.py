@@ -2,9 +2,8 @@ from __future__ import annotations
 
 import typing as tp
 
-from PIL import ImageFont
-
-from .ViewBase import FONT_PATH, SMALL_FONT_SIZE, Alert, Icon
+from .Fonts import FontRegistry
+from .ViewBase import ERROR_ALERT_TTL, ERROR_PRIORITY, FONT_PATH, SMALL_FONT_SIZE, Alert, Icon
 
 if tp.TYPE_CHECKING:
     from .Display import Display
@@ -14,6 +13,10 @@ if tp.TYPE_CHECKING:
 class FailedAuthorizationAlert(Alert):
     """display a message about failed authorization"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.cross
         alert_message: str = "Авторизация\nне пройдена"
@@ -23,6 +26,10 @@ class FailedAuthorizationAlert(Alert):
 class UnitNotFoundAlert(Alert):
     """display a message about being unable to find the unit"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.cross
         alert_message: str = "Изделие\nне найдено"
@@ -32,6 +39,8 @@ class UnitNotFoundAlert(Alert):
 class SuccessfulLogOutAlert(Alert):
     """display a message about successful log out"""
 
+    static = True
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.tick
         alert_message: str = "Сессия\nзавершена"
@@ -41,6 +50,8 @@ class SuccessfulLogOutAlert(Alert):
 class OperationStartedAlert(Alert):
     """display a message about starting operation"""
 
+    static = True
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.tick
         alert_message: str = "Начало\nсборки"
@@ -50,6 +61,8 @@ class OperationStartedAlert(Alert):
 class OperationEndedAlert(Alert):
     """display a message about ending operation"""
 
+    static = True
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.tick
         alert_message: str = "Сборка\nзавершена"
@@ -64,13 +77,17 @@ class SuccessfulAuthorizationAlert(Alert):
         worker_position: str = context.associated_worker.position
         worker_short_name: str = context.associated_worker.short_name
         alert_message: str = f"Авторизован\n{worker_position}\n{worker_short_name}"
-        font: FreeTypeFont = ImageFont.truetype(FONT_PATH, SMALL_FONT_SIZE)
+        font: FreeTypeFont = FontRegistry().get(FONT_PATH, SMALL_FONT_SIZE)
         super().__init__(context, image_path, alert_message, font=font)
 
 
 class AuthorizeFirstAlert(Alert):
     """display a message about authorization needed to scan barcode"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.cross
         alert_message: str = "Необходима\nавторизация"
@@ -80,6 +97,10 @@ class AuthorizeFirstAlert(Alert):
 class ScanBarcodeAlert(Alert):
     """displays the barcode scan prompt"""
 
+    # the prompt is the screen the spoke idles on while authorized
+    transient = False
+    ttl = None
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.barcode_scanner
         alert_message: str = "Сканируйте\nштрихкод"
@@ -90,6 +111,10 @@ class ScanBarcodeAlert(Alert):
 class IdMismatchAlert(Alert):
     """display a message about mismatched id (forbidden log out operation)"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.cross
         alert_message: str = "Авторизован\nдругой\nсотрудник"
@@ -99,6 +124,10 @@ class IdMismatchAlert(Alert):
 class BackendUnreachableAlert(Alert):
     """display a message about broken backend connectivity"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.warning
         alert_message: str = "Нет связи\nс сервером"
@@ -108,6 +137,10 @@ class BackendUnreachableAlert(Alert):
 class OperationForbiddenAlert(Alert):
     """display a message about forbidden state transition"""
 
+    static = True
+    priority = ERROR_PRIORITY
+    ttl = ERROR_ALERT_TTL
+
     def __init__(self, context: Display) -> None:
         image_path: str = Icon.warning
         alert_message: str = "Операция\nне позволена"
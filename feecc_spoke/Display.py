@@ -1,13 +1,22 @@
+import hashlib
 import typing as tp
-from collections import deque
-from threading import Thread
-from time import time
+from dataclasses import asdict
+from threading import Lock, Thread, Timer
+from time import monotonic, time
 
 from loguru import logger
 
 from .Employee import Employee
-from .Types import Config
-from .ViewBase import View
+from . import Alerts  # noqa: F401 (registers the alert views for the frame cache warm up)
+from .Fonts import FontRegistry
+from .FrameDump import DumpedFrame, FrameDump
+from .Glyphs import GlyphAtlas
+from .Icons import IconAtlas
+from .Layout import Window
+from .Metrics import DisplayMetrics
+from .Types import Config, RequestPayload
+from .ViewBase import FONT_PATH, FONT_SIZES, Icon, View
+from .ViewQueue import PendingView, ViewQueue
 from .Views import BlankScreen
 from ._Singleton import SingletonMeta
 
@@ -17,6 +26,10 @@ except Exception as E:
     logger.error(f"Couldn't import EPD library: {E}")
 
 
+SHUTDOWN_TIMEOUT: float = 10  # seconds end_session waits for the render worker to finish
+BUSY_SLICE_MS: int = 50  # how often a refresh in progress looks for newly staged views to prepare
+
+
 class Display(metaclass=SingletonMeta):
     """the context class. handles hardware display operation and view management"""
 
@@ -34,13 +47,44 @@ class Display(metaclass=SingletonMeta):
             logger.warning("E-ink display initialization failed. Fallback to headless mode.")
             logger.debug(E)
 
+        FontRegistry().preload(FONT_PATH, FONT_SIZES)
+        IconAtlas().preload(Icon.paths())
+        GlyphAtlas().preload(FONT_PATH, FONT_SIZES)
+
         self.current_view: tp.Optional[View] = None
-        self._view_queue: tp.Deque[tp.Type[View]] = deque()
-        self._display_thread: tp.Optional[Thread] = None
+        self.metrics: DisplayMetrics = DisplayMetrics()
+        self._view_queue: ViewQueue = ViewQueue(self.metrics)
+        self._render_worker: tp.Optional[Thread] = None
+        self._glass_digest: tp.Optional[bytes] = None
+        self.frame_dump: tp.Optional[FrameDump] = None
+
+        if self.epd is not None:
+            self.frame_dump = FrameDump(
+                size=(self.epd.width, self.epd.height),
+                ring_size=int(self.spoke_config["developer"]["frame_ring_size"]),
+                write_files=bool(self.spoke_config["developer"]["render_images"]),
+            )
+
+        # panel power management. the panel lock is held while the panel is being talked to or powered up and down,
+        # the sleep lock only guards the timer, so that staging a view never waits for a refresh to finish
+        self._panel_lock: Lock = Lock()
+        self._panel_awake: bool = False
+        self._panel_asleep: bool = False
+        self._sleep_lock: Lock = Lock()
+        self._sleep_timer: tp.Optional[Timer] = None
+        self._ticking: bool = False  # the view on the glass still has updates to make
+
+        if not self._headless_mode:
+            self._render_worker = Thread(target=self._render_views, name="render-worker", daemon=True)
+            self._render_worker.start()
 
         # clear the screen at the first start in case it has leftover images on it
         self.render_view(BlankScreen)
 
+        # prerender static views while the screen is being cleared
+        if not self._headless_mode:
+            Thread(target=self._warm_frame_cache, daemon=True).start()
+
     @property
     def _headless_mode(self) -> bool:
         return any((self.epd is None, self.spoke_config["screen"]["enforce_headless"]))
@@ -49,47 +93,290 @@ class Display(metaclass=SingletonMeta):
     def current_view_class(self) -> tp.Optional[tp.Type[View]]:
         return self.current_view.__class__ if self.current_view else None
 
-    @property
-    def _display_busy(self) -> bool:
-        return self._display_thread is not None and self._display_thread.is_alive()
+    def status(self) -> RequestPayload:
+        """the metrics of the display pipeline along with what is on the screen and the frames shown last"""
+        recent_frames: tp.List[DumpedFrame] = self.frame_dump.recent_frames if self.frame_dump is not None else []
+        return {
+            "headless": self._headless_mode,
+            "current_view": self.current_view.name if self.current_view else None,
+            "panel_asleep": self._panel_asleep,
+            **asdict(self.metrics),
+            "recent_frames": [
+                {"view": frame.view_name, "captured_at": frame.captured_at.isoformat()} for frame in recent_frames
+            ],
+        }
 
-    def end_session(self) -> None:
-        """clear the screen if execution is interrupted or script exits"""
-        if not self._headless_mode:
-            self.render_view(BlankScreen)
+    def recent_frame(self, index: int) -> tp.Optional[bytes]:
+        """a frame held by the in-memory ring as a PBM image, counting from the oldest one"""
+        if self.frame_dump is None:
+            return None
+
+        recent_frames: tp.List[DumpedFrame] = self.frame_dump.recent_frames
+        if not 0 <= index < len(recent_frames):
+            return None
+
+        return self.frame_dump.to_pbm(recent_frames[index].frame)
+
+    def end_session(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """clear the screen, let the render worker finish and power the panel down"""
+        if self._headless_mode or self._render_worker is None:
+            return
+
+        with self._sleep_lock:
+            self._cancel_sleep()
+
+        self.render_view(BlankScreen)
+        self._view_queue.close()
+        self._render_worker.join(timeout)
+
+        if self._render_worker.is_alive():
+            logger.warning(f"Render worker did not finish in {timeout} s. Releasing the panel anyway.")
             epdconfig.module_exit()
-            if self._display_thread is not None:
-                self._display_thread.join()
+            return
+
+        # deep sleep keeps the cleared glass intact until the next start and releases the pins as well
+        with self._panel_lock:
+            if self.epd is not None and self._panel_awake:
+                self.epd.sleep()
+                self._panel_awake, self._panel_asleep = False, True
+            elif not self._panel_asleep:
+                epdconfig.module_exit()
+
+    @staticmethod
+    def _static_views() -> tp.List[tp.Type[View]]:
+        """all the view classes which frames do not depend on the session"""
+        views: tp.List[tp.Type[View]] = []
+        pending: tp.List[tp.Type[View]] = View.__subclasses__()
+
+        while pending:
+            view = pending.pop()
+            pending.extend(view.__subclasses__())
+            if view.static:
+                views.append(view)
+
+        return views
+
+    def _warm_frame_cache(self) -> None:
+        """compose and pack all the static views ahead of time so that showing them costs a cache lookup"""
+        start_time: float = time()
+        views: tp.List[tp.Type[View]] = self._static_views()
+
+        for view in views:
+            try:
+                view(self).get_frame()
+            except Exception as E:
+                logger.error(f"Failed to prerender view {view.__name__}: {E}")
+
+        logger.debug(f"Prerendered {len(views)} static views in {round(time() - start_time, 3)} s.")
+
+    @staticmethod
+    def _get_digest(frame: tp.Union[bytes, bytearray]) -> bytes:
+        return hashlib.blake2b(frame, digest_size=16).digest()
+
+    def show_frame(
+        self, frame: tp.Union[bytes, bytearray], partial: bool = False, hint: tp.Optional[Window] = None
+    ) -> bool:
+        """
+        send a packed frame to the panel unless the very same frame is already on the glass.
+        the hint is the only area a partial frame may differ in from the one on the glass.
+        while the panel is busy refreshing, the next pending view is composed into the back buffer
+        """
+        if self.epd is None:
+            return False
+
+        digest: bytes = self._get_digest(frame)
+
+        # the glass keeps its image in deep sleep, so a frame already shown does not wake the panel up
+        if digest == self._glass_digest:
+            self.metrics.frames_skipped += 1
+            logger.debug(f"Frame is already on the display. Skipping refresh. {self.metrics}")
+            return False
+
+        with self._panel_lock:
+            self._ensure_awake()
+            start_time: float = time()
+
+            if partial:
+                self.epd.DisplayPartial(frame, wait=False, hint=hint)
+            else:
+                self.epd.display(frame, wait=False)
+
+            self._glass_digest = digest
+            self.metrics.frames_rendered += 1
+
+            if self.frame_dump is not None:
+                self.frame_dump.capture(self.current_view.name if self.current_view else "Frame", frame)
+            transfer_end_time: float = time()
+            self.metrics.last_transfer_time = round(transfer_end_time - start_time, 3)
+
+            self._wait_for_refresh()
+
+        self.metrics.last_refresh_time = round(time() - transfer_end_time, 3)
+        logger.debug(f"Frame shown. {self.metrics}")
+        return True
+
+    def _wait_for_refresh(self) -> None:
+        """
+        wait for the refresh running on the panel and use the time to prepare what comes next.
+        the wait is sliced, so that a view staged in the middle of the refresh gets prepared as well
+        """
+        if self.epd is None:
+            return
+
+        prepared: tp.Optional[tp.Type[View]] = None
+
+        while self.epd.refreshing:
+            prepared = self._prepare_next_view(prepared)
+            self.epd.ReadBusy(BUSY_SLICE_MS)
+
+    def _prepare_next_view(self, prepared: tp.Optional[tp.Type[View]] = None) -> tp.Optional[tp.Type[View]]:
+        """
+        compose the frame of the first pending view while the panel is busy with the current one,
+        unless it is the view prepared last time. returns the view the back buffer holds
+        """
+        next_view: tp.Optional[tp.Type[View]] = self._view_queue.peek()
+        if next_view is None or next_view is prepared:
+            return prepared
+
+        start_time: float = time()
+
+        try:
+            next_view(self).prepare()
+        except Exception as E:
+            logger.error(f"Failed to prepare view {next_view.__name__}: {E}")
+            return next_view
+
+        self.metrics.frames_prepared += 1
+        self.metrics.hidden_compose_time = round(self.metrics.hidden_compose_time + time() - start_time, 3)
+        return next_view
+
+    def clear_panel(self) -> None:
+        """wipe the glass with black and then white to remove stuck pixels"""
+        if self.epd is None:
+            return
+
+        with self._panel_lock:
+            self._ensure_awake()
+            self.epd.Clear(0x00)
+            self.epd.Clear(0xFF, wait=False)
+            self._wait_for_refresh()
+
+        self._glass_digest = self._get_digest(self.epd.white_frame)
+
+    def _ensure_awake(self) -> None:
+        """power the panel up if it has not been initialized yet or is in deep sleep. needs the panel lock"""
+        if self.epd is None or self._panel_awake:
+            return
+
+        if self._panel_asleep:
+            start_time: float = monotonic()
+            self.epd.wake()
+            self.metrics.wakeups += 1
+            self.metrics.last_wake_latency = round(monotonic() - start_time, 3)
+            logger.info(f"Display woke up from deep sleep in {self.metrics.last_wake_latency} s.")
+        else:
+            self.epd.init()
+
+        self._panel_awake, self._panel_asleep = True, False
+
+    def _schedule_sleep(self) -> None:
+        """put the panel into deep sleep once it has been idle for the configured period. needs the sleep lock"""
+        idle_time: float = float(self.spoke_config["screen"]["sleep_after"])
+        if not idle_time:
+            return
+
+        self._cancel_sleep()
+        self._sleep_timer = Timer(idle_time, self._put_to_sleep)
+        self._sleep_timer.daemon = True
+        self._sleep_timer.start()
+
+    def _cancel_sleep(self) -> None:
+        """needs the sleep lock, so that the worker can not schedule a sleep in between"""
+        if self._sleep_timer is not None:
+            self._sleep_timer.cancel()
+            self._sleep_timer = None
+
+    def _put_to_sleep(self) -> None:
+        with self._panel_lock:
+            if self.epd is None or not self._panel_awake or self._view_queue or self._ticking:
+                return
+
+            logger.info("Display has been idle for a while. Putting it into deep sleep.")
+            self.epd.sleep()
+            self.metrics.sleeps += 1
+            self._panel_awake, self._panel_asleep = False, True
 
     def render_view(self, view: tp.Type[View]) -> None:
-        """handle rendering a view in a separate thread"""
+        """stage a view for the render worker"""
         # drop render task if in headless mode
         if self._headless_mode:
             return
-        # put the view into queue for rendering if it it is not duplicate
-        if self._view_queue and self._view_queue[-1] == view:
-            logger.debug(f"View {view.__name__} is already pending rendering. Dropping task.")
+        # put the view into queue for rendering, the queue drops duplicates and superseded views
+        if self.current_view.__class__ == view and not self._view_queue:
+            logger.debug(f"View {view.__name__} is currently on the display. Identical frames will be skipped.")
+
+        if not self._view_queue.put(view):
             return
-        elif self.current_view.__class__ == view and not self._view_queue:
-            logger.warning(f"View {view.__name__} is currently on the display. Dropping task.")
-
-        logger.debug(f"View {view.__name__} staged for rendering")
-        self._view_queue.append(view)
-
-        # only start a new thread if there's no ongoing rendering process
-        if not self._display_busy:
-            self._display_thread = Thread(target=self._render_view_queue)
-            self._display_thread.start()
-            logger.debug(f"New queue rendering thread started: {repr(self._display_thread)}")
-
-    def _render_view_queue(self) -> None:
-        """render all pending views one by one"""
-        while self._view_queue:
-            pending_view: tp.Type[View] = self._view_queue.popleft()
-            view: View = pending_view(self)
+
+        logger.debug(f"View {view.__name__} staged for rendering. Queue depth: {len(self._view_queue)}")
+
+        with self._sleep_lock:
+            self._cancel_sleep()
+
+    def _run_ticks(self, view: View) -> None:
+        """keep updating a long-running view until it is done or any other view is staged"""
+        self._ticking = True
+
+        try:
+            next_tick: tp.Optional[float] = view.tick()
+
+            while next_tick is not None:
+                if self._view_queue.wait(next_tick):
+                    logger.debug(f"View '{view.name}' preempted")
+                    return
+
+                next_tick = view.tick()
+        finally:
+            self._ticking = False
+
+    def _render_views(self) -> None:
+        """the render worker: display staged views one by one for as long as the queue is open"""
+        while True:
+            # checked and scheduled under the lock render_view cancels the sleep with, so a staged view always wins
+            with self._sleep_lock:
+                if not self._view_queue and not self._view_queue.closed:
+                    self._schedule_sleep()
+
+            pending: tp.Optional[PendingView] = self._view_queue.get()
+            if pending is None:
+                break
+
+            self.metrics.last_queue_wait = round(monotonic() - pending.enqueued_at, 3)
+            view: View = pending.view(self)
             self.current_view = view
             logger.info(f"Rendering view {view.name}")
-            start_time: float = time()
-            view.display()
-            end_time: float = time()
-            logger.debug(f"View '{view.name}' displayed in {round(end_time-start_time, 3)} s.")
+            start_time: float = monotonic()
+
+            try:
+                view.display()
+            except Exception as E:
+                logger.error(f"Failed to render view {view.name}: {E}")
+                continue
+
+            self.metrics.last_render_time = round(monotonic() - start_time, 3)
+            logger.debug(
+                f"View '{view.name}' displayed in {self.metrics.last_render_time} s. "
+                f"It waited in the queue for {self.metrics.last_queue_wait} s."
+            )
+
+            # the on-screen time is a deadline only views of a higher priority may cut short
+            if self._view_queue.wait(monotonic() + view.onscreen_time, view.priority):
+                logger.debug(f"View '{view.name}' preempted before its on-screen time ran out")
+                continue
+
+            try:
+                self._run_ticks(view)
+            except Exception as E:
+                logger.error(f"View {view.name} failed to update: {E}")
+
+        logger.info("Render worker stopped")
@@ -2,5 +2,13 @@ class BackendUnreachableError(Exception):
     pass
 
 
+class HubError(BackendUnreachableError):
+    """the hub failed to handle a request: it replied with a server error or another unexpected status"""
+
+    def __init__(self, message: str, status: int) -> None:
+        super().__init__(message)
+        self.status: int = status
+
+
 class StateForbiddenError(Exception):
     pass
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+import typing as tp
+from threading import Lock
+
+from PIL import ImageFont
+from loguru import logger
+
+from ._Singleton import SingletonMeta
+
+if tp.TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+
+class FontRegistry(metaclass=SingletonMeta):
+    """loads every font face once per process and shares it between all the views"""
+
+    def __init__(self) -> None:
+        self._fonts: tp.Dict[tp.Tuple[str, int], FreeTypeFont] = {}
+        self._lock: Lock = Lock()
+
+    def get(self, path: str, size: int) -> FreeTypeFont:
+        """get the font face of the provided size, loading it from disk on the first request"""
+        key: tp.Tuple[str, int] = (path, size)
+        font: tp.Optional[FreeTypeFont] = self._fonts.get(key)
+
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    font = ImageFont.truetype(path, size)
+                    self._fonts[key] = font
+                    logger.debug(f"Loaded font {os.path.basename(path)} of size {size}")
+
+        return font
+
+    def preload(self, path: str, sizes: tp.Iterable[int]) -> None:
+        """load the listed sizes ahead of time so that views never touch the disk"""
+        for size in sizes:
+            self.get(path, size)
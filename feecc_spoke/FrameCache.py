@@ -0,0 +1,52 @@
+import typing as tp
+from collections import OrderedDict
+from threading import Lock
+
+from loguru import logger
+
+from ._Singleton import SingletonMeta
+
+FRAME_CACHE_SIZE: int = 32
+
+
+class FrameCache(metaclass=SingletonMeta):
+    """bounded LRU storage of packed, ready to send frames keyed by the view and its dynamic inputs"""
+
+    def __init__(self, max_size: int = FRAME_CACHE_SIZE) -> None:
+        self._max_size: int = max_size
+        self._frames: tp.OrderedDict[tp.Hashable, bytes] = OrderedDict()
+        self._lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: tp.Hashable) -> tp.Optional[bytes]:
+        with self._lock:
+            frame: tp.Optional[bytes] = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key: tp.Hashable, frame: bytes) -> None:
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+
+            while len(self._frames) > self._max_size:
+                evicted, _ = self._frames.popitem(last=False)
+                logger.debug(f"Frame {evicted} evicted from the frame cache")
+
+    def get_or_render(self, key: tp.Hashable, render: tp.Callable[[], bytes]) -> bytes:
+        """get the cached frame or render and store it if there is none"""
+        frame: tp.Optional[bytes] = self.get(key)
+
+        if frame is None:
+            self.misses += 1
+            frame = render()
+            self.put(key, frame)
+        else:
+            self.hits += 1
+
+        return frame
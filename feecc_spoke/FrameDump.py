@@ -0,0 +1,118 @@
+import os
+import typing as tp
+from collections import deque
+from datetime import datetime as dt
+from queue import Full, Queue
+from threading import Thread
+
+from loguru import logger
+
+FRAME_DUMP_DIRECTORY: str = "img"
+FRAME_DUMP_QUEUE_SIZE: int = 8  # frames waiting to be written before new ones get dropped
+FRAME_DUMP_FILES_KEPT: int = 16  # files left on the disk when the in-memory ring is disabled
+
+# flips every bit of a byte: packed frames store white as 1, PBM stores black as 1
+INVERT_TABLE: bytes = bytes(0xFF - i for i in range(256))
+
+
+class DumpedFrame(tp.NamedTuple):
+    view_name: str
+    captured_at: dt
+    frame: bytes
+
+
+class FrameDump:
+    """
+    captures the packed frames sent to the panel. the last frames are kept in memory
+    and, if enabled, every frame is written as a PBM file by a background writer.
+    only as many files as the ring holds are left on the disk, older ones are removed
+    """
+
+    def __init__(
+        self,
+        size: tp.Tuple[int, int],
+        ring_size: int = 0,
+        write_files: bool = False,
+        directory: str = FRAME_DUMP_DIRECTORY,
+    ) -> None:
+        self._size: tp.Tuple[int, int] = size  # width and height of the packed frame in pixels
+        self._directory: str = directory
+        self._ring: tp.Deque[DumpedFrame] = deque(maxlen=ring_size)
+        self._queue: "Queue[DumpedFrame]" = Queue(maxsize=FRAME_DUMP_QUEUE_SIZE)
+        self._write_files: bool = write_files
+        self._files: tp.Deque[str] = deque()  # written files, oldest first
+        self._files_kept: int = ring_size or FRAME_DUMP_FILES_KEPT
+        self.frames_written: int = 0
+        self.frames_dropped: int = 0
+
+        if write_files:
+            Thread(target=self._write_frames, name="frame-dump-writer", daemon=True).start()
+
+    @property
+    def enabled(self) -> bool:
+        return self._write_files or self._ring.maxlen != 0
+
+    @property
+    def recent_frames(self) -> tp.List[DumpedFrame]:
+        """the frames held by the in-memory ring, oldest first"""
+        return list(self._ring)
+
+    def capture(self, view_name: str, frame: tp.Union[bytes, bytearray]) -> None:
+        """record a frame without blocking. if the writer falls behind the frame is not written"""
+        if not self.enabled:
+            return
+
+        dumped_frame = DumpedFrame(view_name, dt.now(), bytes(frame))
+        self._ring.append(dumped_frame)
+
+        if not self._write_files:
+            return
+
+        try:
+            self._queue.put_nowait(dumped_frame)
+        except Full:
+            self.frames_dropped += 1
+            logger.debug(f"Frame dump queue is full. Dropped a frame of {view_name} ({self.frames_dropped} so far)")
+
+    def to_pbm(self, frame: bytes) -> bytes:
+        """encode a packed frame as a binary PBM image"""
+        width, height = self._size
+        return f"P4\n{width} {height}\n".encode() + frame.translate(INVERT_TABLE)
+
+    def _find_files(self) -> None:
+        """pick up the files left by the previous runs so that they are removed in turn"""
+        paths = (os.path.join(self._directory, name) for name in os.listdir(self._directory))
+        self._files.extend(sorted((path for path in paths if path.endswith(".pbm")), key=os.path.getmtime))
+
+    def _remove_old_files(self) -> None:
+        while len(self._files) > self._files_kept:
+            path: str = self._files.popleft()
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as E:
+                logger.error(f"Failed to remove the frame dump '{path}': {E}")
+
+    def _write_frames(self) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        self._find_files()
+        self._remove_old_files()
+
+        while True:
+            dumped_frame: DumpedFrame = self._queue.get()
+            timestamp: str = dumped_frame.captured_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+            image_name = f"{self._directory}/{dumped_frame.view_name}-{timestamp}.pbm"
+
+            try:
+                with open(image_name, "wb") as f:
+                    f.write(self.to_pbm(dumped_frame.frame))
+                self.frames_written += 1
+                logger.debug(f"Saved a frame of {dumped_frame.view_name} as '{os.path.basename(image_name)}'")
+            except Exception as E:
+                logger.error(f"Failed to save a frame of {dumped_frame.view_name}: {E}")
+                continue
+
+            self._files.append(image_name)
+            self._remove_old_files()
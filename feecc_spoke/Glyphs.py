@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import typing as tp
+from threading import Lock
+
+from PIL import Image
+from loguru import logger
+
+from .Fonts import FontRegistry
+from ._Singleton import SingletonMeta
+
+if tp.TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+# every character the hot text paths may draw
+GLYPH_ALPHABET: str = "0123456789:" "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ" "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+class Glyph(tp.NamedTuple):
+    """a pre-rasterized character. every row is an int with the leftmost pixel in the highest bit"""
+
+    rows: tp.Tuple[int, ...]
+    width: int
+    offset: tp.Tuple[int, int]  # from the pen position to the upper left corner of the bitmap
+
+
+class GlyphStrip(tp.NamedTuple):
+    """all the glyphs of a single font face and size"""
+
+    font: FreeTypeFont
+    glyphs: tp.Dict[str, Glyph]
+    shifts: tp.Dict[tp.Tuple[str, str], tp.Optional[int]]  # pen advance between two adjacent glyphs, if verified
+
+
+class GlyphAtlas(metaclass=SingletonMeta):
+    """
+    rasterizes the alphabet once per font size and composes single line strings straight into the bytes
+    of a mode "1" image, producing the same pixels as ImageDraw.text would
+    """
+
+    def __init__(self) -> None:
+        self._strips: tp.Dict[tp.Tuple[str, int], GlyphStrip] = {}
+        self._lock: Lock = Lock()
+
+    def get(self, font: FreeTypeFont) -> GlyphStrip:
+        """get the glyph strip of the font, rasterizing it on the first request"""
+        key: tp.Tuple[str, int] = (font.path, font.size)
+        strip: tp.Optional[GlyphStrip] = self._strips.get(key)
+
+        if strip is None:
+            with self._lock:
+                strip = self._strips.get(key)
+                if strip is None:
+                    strip = self._rasterize(font, GLYPH_ALPHABET)
+                    self._strips[key] = strip
+                    logger.debug(f"Rasterized {len(strip.glyphs)} glyphs of size {font.size}")
+
+        return strip
+
+    def preload(self, path: str, sizes: tp.Iterable[int]) -> None:
+        """rasterize the listed sizes ahead of time"""
+        for size in sizes:
+            self.get(FontRegistry().get(path, size))
+
+    @staticmethod
+    def _get_glyph(font: FreeTypeFont, text: str) -> Glyph:
+        mask, offset = font.getmask2(text, mode="1")
+        width, height = mask.size
+
+        if not width or not height:
+            return Glyph((0,) * height, width, offset)
+
+        # the mask holds a byte per pixel, packing it leaves every row padded to whole bytes
+        packed: bytes = Image.frombytes("1", mask.size, bytes(mask), "raw", "1;8").tobytes()
+        stride: int = (width + 7) // 8
+        padding: int = stride * 8 - width
+        rows: tp.Tuple[int, ...] = tuple(
+            int.from_bytes(packed[start:][:stride], "big") >> padding for start in range(0, stride * height, stride)
+        )
+        return Glyph(rows, width, offset)
+
+    def _rasterize(self, font: FreeTypeFont, alphabet: str) -> GlyphStrip:
+        return GlyphStrip(font, {char: self._get_glyph(font, char) for char in alphabet}, {})
+
+    def _get_shift(self, strip: GlyphStrip, first: str, second: str) -> tp.Optional[int]:
+        """
+        find how far FreeType moves the pen between two glyphs by matching the pair against its own rendering.
+        hinted advances and kerning make it differ from getlength, so it is measured once per pair
+        """
+        pair: tp.Tuple[str, str] = (first, second)
+
+        if pair in strip.shifts:
+            return strip.shifts[pair]
+
+        rendered: Glyph = self._get_glyph(strip.font, first + second)
+        left, right = strip.glyphs[first], strip.glyphs[second]
+        advance: int = int(strip.font.getlength(first, mode="1"))
+        shift: tp.Optional[int] = None
+
+        for candidate in sorted(range(advance - 3, advance + 4), key=lambda d: abs(d - advance)):
+            rows: tp.Dict[int, int] = {}
+            placed = self._place(rows, left, 0, 0, rendered.width, rendered.offset)
+            placed = placed and self._place(rows, right, candidate, 0, rendered.width, rendered.offset)
+
+            if placed and all(y < len(rendered.rows) for y in rows):
+                if all(rows.get(y, 0) == row for y, row in enumerate(rendered.rows)):
+                    shift = candidate
+                    break
+
+        strip.shifts[pair] = shift
+        return shift
+
+    @staticmethod
+    def _place(
+        rows: tp.Dict[int, int], glyph: Glyph, x: int, y: int, width: int, origin: tp.Tuple[int, int] = (0, 0)
+    ) -> bool:
+        """or the glyph drawn at the pen position into rows of the provided width. False if it does not fit"""
+        left: int = x + glyph.offset[0] - origin[0]
+        top: int = y + glyph.offset[1] - origin[1]
+
+        if glyph.rows and (left < 0 or left + glyph.width > width or top < 0):
+            return False
+
+        for i, row in enumerate(glyph.rows):
+            if row:
+                rows[top + i] = rows.get(top + i, 0) | row << (width - left - glyph.width)
+
+        return True
+
+    def supports(self, text: str, font: FreeTypeFont) -> bool:
+        """whether the text can be blitted with the exact same result as ImageDraw.text"""
+        if not text or "\n" in text:
+            return False
+
+        strip: GlyphStrip = self.get(font)
+
+        if any(char not in strip.glyphs for char in text):
+            return False
+
+        return all(self._get_shift(strip, *pair) is not None for pair in zip(text, text[1:]))
+
+    def draw(
+        self, frame: bytearray, size: tp.Tuple[int, int], xy: tp.Tuple[int, int], text: str, font: FreeTypeFont
+    ) -> bool:
+        """
+        draw black text onto the bytes of a mode "1" image of the provided size.
+        returns False without touching the frame if the text can not be blitted
+        """
+        if not self.supports(text, font):
+            return False
+
+        strip: GlyphStrip = self.get(font)
+        width, height = size
+        stride: int = (width + 7) // 8
+        rows: tp.Dict[int, int] = {}
+        x, top = xy
+
+        # lay the string out into full width rows first, then touch every frame row only once
+        for i, char in enumerate(text):
+            if i:
+                x += tp.cast(int, self._get_shift(strip, text[i - 1], char))
+
+            if not self._place(rows, strip.glyphs[char], x, top, stride * 8):
+                return False
+
+        # the padding bits past the right edge must stay blank as well
+        padding: int = (1 << (stride * 8 - width)) - 1
+        if any(y >= height or ink & padding for y, ink in rows.items()):
+            return False
+
+        for y, ink in rows.items():
+            row: slice = slice(y * stride, (y + 1) * stride)
+            packed: int = int.from_bytes(frame[row], "big") & ~ink
+            frame[row] = packed.to_bytes(stride, "big")
+
+        return True
+
+    @staticmethod
+    def fill(frame: bytearray, size: tp.Tuple[int, int], box: tp.Tuple[int, int, int, int], color: int) -> None:
+        """same as ImageDraw.rectangle with no outline on the bytes of a mode "1" image (box is inclusive)"""
+        width, height = size
+        stride: int = (width + 7) // 8
+        x0, y0 = max(box[0], 0), max(box[1], 0)
+        x1, y1 = min(box[2], width - 1), min(box[3], height - 1)
+
+        if x0 > x1 or y0 > y1:
+            return
+
+        span: int = ((1 << (x1 - x0 + 1)) - 1) << (stride * 8 - x1 - 1)
+
+        for y in range(y0, y1 + 1):
+            row: slice = slice(y * stride, (y + 1) * stride)
+            packed: int = int.from_bytes(frame[row], "big")
+            packed = packed | span if color else packed & ~span
+            frame[row] = packed.to_bytes(stride, "big")
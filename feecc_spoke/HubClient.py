@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import typing as tp
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Thread
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from .Exceptions import BackendUnreachableError, HubError
+from .Types import RequestPayload
+
+if tp.TYPE_CHECKING:
+    from concurrent.futures import Future
+
+HUB_POOL_SIZE: int = 4  # idle connections to the hub kept open for reuse
+HUB_MAX_CONNECTIONS: int = 16  # requests that may be in flight at once, each needs a connection of its own
+HUB_LOOP_GRACE: float = 0.5  # seconds a caller waits past the timeout of a request before giving up on the loop
+
+T = tp.TypeVar("T")
+Connection = tp.Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class Endpoint(tp.NamedTuple):
+    method: str
+    path: str  # formatted with the workbench number and the unit internal id
+    timeout: tp.Tuple[float, float]  # connect and read timeouts in seconds
+
+    @property
+    def total_timeout(self) -> float:
+        return sum(self.timeout)
+
+
+class Response(tp.NamedTuple):
+    status: int
+    body: bytes
+
+
+# the hub is on the LAN, so a connection that takes longer than half a second to open is not coming
+ENDPOINTS: tp.Dict[str, Endpoint] = {
+    "status": Endpoint("GET", "/api/workbench/{workbench_no}/status", (0.5, 1)),
+    "log-in": Endpoint("POST", "/api/employee/log-in", (0.5, 1)),
+    "log-out": Endpoint("POST", "/api/employee/log-out", (0.5, 1)),
+    "start": Endpoint("POST", "/api/unit/{unit_id}/start", (0.5, 1)),
+    "end": Endpoint("POST", "/api/unit/{unit_id}/end", (0.5, 1)),
+    "upload": Endpoint("POST", "/api/unit/{unit_id}/upload", (0.5, 3)),
+}
+
+
+class StaleConnectionError(ConnectionError):
+    """the hub closed a pooled connection before replying"""
+
+
+class HubClient:
+    """
+    sends requests to the hub over a pool of keep-alive HTTP/1.1 connections.
+    the requests run as coroutines on an event loop of the client's own thread, so any number of them may be
+    in flight without a thread each. synchronous code waits for them with request() and gather().
+    the pool is warmed up in the background at startup and again once the client has been idle for a while,
+    so that the requests made on a scan do not have to open a connection first
+    """
+
+    def __init__(self, hub_url: str, workbench_no: int, warm_up_after: float = 0) -> None:
+        url = urlsplit(hub_url)
+        self._ssl: bool = url.scheme == "https"
+        self._host: str = url.hostname or "localhost"
+        self._port: int = url.port or (443 if self._ssl else 80)
+        self._base_path: str = url.path.rstrip("/")
+        self._workbench_no: int = workbench_no
+        self._warm_up_after: float = warm_up_after  # seconds of idling before the pool is warmed up, 0 disables it
+
+        # only ever touched from the event loop
+        self._idle: tp.Deque[Connection] = deque()
+        self._slots: tp.Optional[asyncio.Semaphore] = None
+        self._warm_up_handle: tp.Optional[asyncio.TimerHandle] = None
+
+        self._loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        Thread(target=self._loop.run_forever, name="hub-client", daemon=True).start()
+
+    def url(self, endpoint: str, unit_id: tp.Optional[str] = None) -> str:
+        path: str = ENDPOINTS[endpoint].path.format(workbench_no=self._workbench_no, unit_id=unit_id)
+        return self._base_path + path
+
+    def submit(self, coroutine: tp.Awaitable[T]) -> Future[T]:
+        """schedule a coroutine on the event loop of the client from any other thread"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)  # type: ignore
+
+    def _wait(self, future: Future[T], timeout: float) -> T:
+        """wait for a submitted request, giving up if the event loop does not finish it in time"""
+        try:
+            return future.result(timeout + HUB_LOOP_GRACE)
+        except FutureTimeoutError:
+            future.cancel()
+            raise BackendUnreachableError(f"Hub client did not finish a request in {timeout} s")
+
+    def request(
+        self,
+        endpoint: str,
+        payload: tp.Optional[RequestPayload] = None,
+        unit_id: tp.Optional[str] = None,
+        idempotency_key: tp.Optional[str] = None,
+    ) -> RequestPayload:
+        """send a request to one of the hub endpoints and wait for the reply"""
+        future: Future[RequestPayload] = self.submit(self.fetch(endpoint, payload, unit_id, idempotency_key))
+        return self._wait(future, ENDPOINTS[endpoint].total_timeout)
+
+    def gather(
+        self, *coroutines: tp.Awaitable[T], timeout: tp.Optional[float] = None
+    ) -> tp.List[tp.Union[T, BaseException]]:
+        """
+        run independent requests concurrently and wait for all of them. failures are returned in place.
+        by default waits as long as the slowest endpoint may take
+        """
+
+        async def gather() -> tp.List[tp.Union[T, BaseException]]:
+            return list(await asyncio.gather(*coroutines, return_exceptions=True))
+
+        if timeout is None:
+            timeout = max(endpoint.total_timeout for endpoint in ENDPOINTS.values())
+
+        return self._wait(self.submit(gather()), timeout)
+
+    async def fetch(
+        self,
+        endpoint: str,
+        payload: tp.Optional[RequestPayload] = None,
+        unit_id: tp.Optional[str] = None,
+        idempotency_key: tp.Optional[str] = None,
+    ) -> RequestPayload:
+        """
+        send a request to one of the hub endpoints. a request the hub turns down (4xx) gets a reply with a false
+        status, like any other reply it is for the caller to read. raises HubError if the hub fails to handle
+        the request and BackendUnreachableError if no valid reply came back within the timeouts of the endpoint.
+        the idempotency key lets the hub recognize a request it has already handled when it is sent again
+        """
+        try:
+            return await self._send(endpoint, payload, unit_id, idempotency_key)
+        finally:
+            # the pool is warmed up again once the client has been idle for a while after this request
+            self._schedule_warm_up()
+
+    async def _send(
+        self,
+        endpoint: str,
+        payload: tp.Optional[RequestPayload],
+        unit_id: tp.Optional[str],
+        idempotency_key: tp.Optional[str],
+    ) -> RequestPayload:
+        method, _, timeout = ENDPOINTS[endpoint]
+        path: str = self.url(endpoint, unit_id)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(HUB_MAX_CONNECTIONS)
+
+        try:
+            async with self._slots:
+                exchange = self._exchange(method, path, payload, idempotency_key, *timeout)
+                response: Response = await asyncio.wait_for(exchange, ENDPOINTS[endpoint].total_timeout)
+            reply: tp.Any = None
+            if 200 <= response.status < 300:
+                reply = json.loads(response.body)
+                if not isinstance(reply, dict):
+                    raise ValueError(f"expected a JSON object, got {type(reply).__name__}")
+        except Exception as E:
+            raise BackendUnreachableError(f"{method} {self._host}:{self._port}{path} failed: {E!r}") from E
+
+        if reply is not None:
+            return dict(reply)
+
+        text: str = response.body[:200].decode(errors="replace")
+        message: str = f"{method} {path} got HTTP {response.status} from the hub: {text}"
+
+        if 400 <= response.status < 500:
+            return self._rejection(response, message)
+
+        raise HubError(message, response.status)
+
+    @staticmethod
+    def _rejection(response: Response, message: str) -> RequestPayload:
+        """the reply to a request the hub has turned down, with the status and comment of its body if it has them"""
+        rejection: RequestPayload = {"status": False, "comment": message}
+
+        try:
+            body: tp.Any = json.loads(response.body)
+        except ValueError:
+            return rejection
+
+        return {**rejection, **body} if isinstance(body, dict) else rejection
+
+    async def _exchange(
+        self,
+        method: str,
+        path: str,
+        payload: tp.Optional[RequestPayload],
+        idempotency_key: tp.Optional[str],
+        connect_timeout: float,
+        read_timeout: float,
+    ) -> Response:
+        body: bytes = json.dumps(payload).encode() if payload is not None else b""
+        head: str = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self._host}:{self._port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Accept: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if payload is not None:
+            head += "Content-Type: application/json\r\n"
+        if idempotency_key is not None:
+            head += f"Idempotency-Key: {idempotency_key}\r\n"
+        message: bytes = (head + "\r\n").encode() + body
+
+        # a pooled connection may have been closed by the hub in the meantime, a fresh one is opened then
+        while self._idle:
+            connection: Connection = self._idle.pop()
+
+            if connection[0].at_eof():
+                connection[1].close()
+                continue
+
+            try:
+                return await self._round_trip(connection, message, read_timeout)
+            except StaleConnectionError:
+                continue
+
+        connection = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl or None), connect_timeout
+        )
+        return await self._round_trip(connection, message, read_timeout)
+
+    async def _round_trip(self, connection: Connection, message: bytes, read_timeout: float) -> Response:
+        reader, writer = connection
+
+        try:
+            writer.write(message)
+            await writer.drain()
+            response, reusable = await asyncio.wait_for(self._read_response(reader), read_timeout)
+        except BaseException:
+            writer.close()
+            raise
+
+        if reusable and len(self._idle) < HUB_POOL_SIZE:
+            self._idle.append(connection)
+        else:
+            writer.close()
+
+        return response
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> tp.Tuple[Response, bool]:
+        """read a response off the connection. returns it and whether the connection can be reused"""
+        status_line: bytes = await reader.readline()
+
+        if not status_line:
+            raise StaleConnectionError("connection closed by the hub")
+
+        version, status = status_line.decode("latin-1").split()[:2]
+        headers: tp.Dict[str, str] = {}
+
+        while True:
+            line: bytes = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        reusable: bool = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        body: bytes = b""
+
+        # informational, no content and not modified responses never have a body, whatever their headers say
+        if int(status) < 200 or int(status) in (204, 304):
+            pass
+
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                chunk_size: int = int((await reader.readline()).split(b";")[0], 16)
+                if not chunk_size:
+                    while await reader.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += await reader.readexactly(chunk_size)
+                await reader.readexactly(2)
+
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+
+        # without a length the body ends with the connection, which only works if the hub is closing it
+        elif not reusable:
+            body = await reader.read()
+
+        # otherwise nothing tells where the body ends, so none is read and the connection is dropped
+        else:
+            reusable = False
+
+        logger.debug(f"Hub replied {status} with {len(body)} bytes")
+        return Response(int(status), body), reusable
+
+    def warm_up(self) -> None:
+        """open a connection to the hub in the background"""
+        self.submit(self._ping())
+
+    async def _ping(self) -> None:
+        """open a connection with a status request. unlike a real request it does not schedule another warm up"""
+        try:
+            await self._send("status", None, None, None)
+            logger.debug("Hub connection pool warmed up")
+        except BackendUnreachableError as E:
+            logger.debug(f"Failed to warm up the hub connection pool: {E}")
+
+    def _schedule_warm_up(self) -> None:
+        if not self._warm_up_after:
+            return
+
+        if self._warm_up_handle is not None:
+            self._warm_up_handle.cancel()
+
+        self._warm_up_handle = self._loop.call_later(self._warm_up_after, lambda: self._loop.create_task(self._ping()))
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+import typing as tp
+from threading import Lock
+
+from PIL import Image
+from loguru import logger
+
+from ._Singleton import SingletonMeta
+
+ICON_SIZE: tp.Tuple[int, int] = (50, 50)
+
+
+class IconAtlas(metaclass=SingletonMeta):
+    """
+    decodes, scales and dithers every icon once and keeps it as a ready to paste mode "1" bitmap.
+    an icon is prepared again only if its file has been modified since
+    """
+
+    def __init__(self) -> None:
+        self._icons: tp.Dict[tp.Tuple[str, tp.Tuple[int, int]], tp.Tuple[float, Image.Image]] = {}
+        self._lock: Lock = Lock()
+
+    def get(self, path: str, size: tp.Tuple[int, int] = ICON_SIZE) -> Image.Image:
+        """get the icon bitmap, preparing it if it is not cached yet or the file has changed"""
+        key = (path, size)
+        mtime: float = os.stat(path).st_mtime
+        cached = self._icons.get(key)
+
+        if cached is None or cached[0] != mtime:
+            with self._lock:
+                # pasting onto a mode "1" canvas used to dither the icon on every render, do it once instead
+                bitmap: Image.Image = Image.open(path).resize(size).convert("1")
+                self._icons[key] = mtime, bitmap
+                logger.debug(f"Icon {os.path.basename(path)} prepared at {size[0]}x{size[1]}")
+                return bitmap
+
+        return cached[1]
+
+    def preload(self, paths: tp.Iterable[str], size: tp.Tuple[int, int] = ICON_SIZE) -> None:
+        """prepare the listed icons ahead of time"""
+        for path in paths:
+            self.get(path, size)
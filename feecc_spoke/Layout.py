@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import typing as tp
+from dataclasses import dataclass
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+from loguru import logger
+
+from .Fonts import FontRegistry
+from .Glyphs import GlyphAtlas
+from .Icons import ICON_SIZE, IconAtlas
+from .TextMetrics import TextMetrics
+
+if tp.TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+Box = tp.Tuple[int, int, int, int]  # x0, y0, x1, y1 of an image area, both corners inclusive like ImageDraw.rectangle
+Window = tp.Tuple[int, int, int, int]  # first and last byte column, first and last row of a packed panel frame
+
+
+@dataclass(frozen=True)
+class Region:
+    """a named part of a view. regions are laid out top to bottom in the order they are declared"""
+
+    name: str
+    top: int = 0  # y of the region, counted from the bottom of the `below` region if there is one
+    below: tp.Optional[str] = None
+    left: tp.Optional[int] = None  # None centers the region horizontally
+
+
+@dataclass(frozen=True)
+class TextRegion(Region):
+    """static text drawn once into the background"""
+
+    text: str = ""
+    font_size: int = 0
+    align: str = "left"
+
+
+@dataclass(frozen=True)
+class IconRegion(Region):
+    """an icon drawn once into the background"""
+
+    path: str = ""
+    size: tp.Tuple[int, int] = ICON_SIZE
+
+
+@dataclass(frozen=True)
+class SlotRegion(Region):
+    """a single line of text that changes between frames. the samples are the widest texts it has to fit"""
+
+    font_size: int = 0
+    samples: tp.Tuple[str, ...] = ()
+
+
+class Slot(tp.NamedTuple):
+    font: FreeTypeFont
+    left: tp.Optional[int]
+    top: int
+    box: Box  # every pixel the slot may ever cover
+    window: Window  # the same area in the packed frame sent to the panel (before the frame is rotated)
+
+
+class LayoutPlan(tp.NamedTuple):
+    """a compiled layout: the static regions drawn into a background and the fixed rectangles of the slots"""
+
+    size: tp.Tuple[int, int]
+    background: bytes  # the bytes of a mode "1" image
+    boxes: tp.Dict[str, Box]
+    slots: tp.Dict[str, Slot]
+
+    def fill_slot(self, frame: bytearray, name: str, text: str) -> None:
+        """wipe the slot in the image bytes and draw the text into it"""
+        slot: Slot = self.slots[name]
+        x: int = slot.left if slot.left is not None else TextMetrics().center(text, slot.font, *self.size)[0]
+        glyphs: GlyphAtlas = GlyphAtlas()
+        glyphs.fill(frame, self.size, slot.box, 255)
+
+        # PIL only draws what the atlas can not
+        if not glyphs.draw(frame, self.size, (x, slot.top), text, slot.font):
+            image = Image.frombytes("1", self.size, bytes(frame))
+            ImageDraw.Draw(image).text((x, slot.top), text, font=slot.font, fill=0)
+            frame[:] = image.tobytes()
+
+
+def to_panel_window(box: Box, size: tp.Tuple[int, int]) -> Window:
+    """
+    map an area of a landscape view image onto the portrait panel frame it is packed into.
+    the packer turns the image 90 degrees counterclockwise, a 180 degree turn is applied to the packed frame
+    """
+    width, _ = size
+    x0, y0, x1, y1 = box
+
+    # image (x, y) lands on panel (y, width - 1 - x)
+    return y0 // 8, y1 // 8, width - 1 - x1, width - 1 - x0
+
+
+@lru_cache(maxsize=32)
+def compile_layout(font_path: str, regions: tp.Tuple[Region, ...], size: tp.Tuple[int, int]) -> LayoutPlan:
+    """resolve the regions into pixel rectangles, drawing the static ones into the background"""
+    width, height = size
+    fonts: FontRegistry = FontRegistry()
+    metrics: TextMetrics = TextMetrics()
+    background: Image.Image = Image.new("1", size, 255)
+    draw: ImageDraw.ImageDraw = ImageDraw.Draw(background)
+    boxes: tp.Dict[str, Box] = {}
+    slots: tp.Dict[str, Slot] = {}
+
+    for region in regions:
+        top: int = region.top if region.below is None else boxes[region.below][3] + region.top
+
+        if isinstance(region, TextRegion):
+            font: FreeTypeFont = fonts.get(font_path, region.font_size)
+            w, h = metrics.size(region.text, font)
+            left: int = region.left if region.left is not None else metrics.center(region.text, font, *size)[0]
+            draw.text((left, top), region.text, font=font, fill=0, align=region.align)
+            boxes[region.name] = left, top, left + w, top + h
+
+        elif isinstance(region, IconRegion):
+            icon_w, icon_h = region.size
+            left = region.left if region.left is not None else (width - icon_w) // 2
+            background.paste(IconAtlas().get(region.path, region.size), (left, top))
+            boxes[region.name] = left, top, left + icon_w, top + icon_h
+
+        elif isinstance(region, SlotRegion):
+            font = fonts.get(font_path, region.font_size)
+            extents: tp.List[Box] = []
+            for sample in region.samples:
+                w, h = metrics.size(sample, font)
+                left = region.left if region.left is not None else metrics.center(sample, font, *size)[0]
+                extents.append((left, top, left + w, top + h))
+            box: Box = (
+                min(e[0] for e in extents),
+                top,
+                max(e[2] for e in extents),
+                max(e[3] for e in extents),
+            )
+            slots[region.name] = Slot(font, region.left, top, box, to_panel_window(box, size))
+            boxes[region.name] = box
+
+    logger.debug(f"Compiled a layout of {len(regions)} regions for {width}x{height}")
+    return LayoutPlan(size, background.tobytes(), boxes, slots)
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class DisplayMetrics:
+    """counters and timings of the display pipeline"""
+
+    frames_rendered: int = 0  # frames sent to the panel
+    frames_skipped: int = 0  # frames identical to the one on the glass
+    sleeps: int = 0  # times the panel was put into deep sleep
+    wakeups: int = 0  # times the panel was woken up from deep sleep
+    last_wake_latency: float = 0.0  # seconds the last wake up took
+    last_compose_time: float = 0.0  # seconds it took to draw and pack the last frame
+    last_transfer_time: float = 0.0  # seconds it took to send the last frame to the controller
+    last_refresh_time: float = 0.0  # seconds from starting the last refresh until the panel was ready again
+    frames_prepared: int = 0  # frames composed in the background while the panel was busy
+    hidden_compose_time: float = 0.0  # total seconds of composing done while the panel was busy
+    queue_depth: int = 0  # views waiting to be rendered
+    max_queue_depth: int = 0  # the most views that have been waiting at once
+    views_dropped: int = 0  # views superseded, expired or duplicated before they were rendered
+    last_queue_wait: float = 0.0  # seconds the last view waited in the queue before rendering started
+    last_render_time: float = 0.0  # seconds it took to display the last view
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import typing as tp
+from concurrent.futures import Future
+from datetime import datetime as dt
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+from time import sleep, time
+from uuid import uuid4
+
+from loguru import logger
+
+from .Exceptions import BackendUnreachableError
+from .Types import RequestPayload
+
+if tp.TYPE_CHECKING:
+    from .HubClient import HubClient
+
+OUTBOX_ENDPOINTS: tp.Tuple[str, ...] = ("start", "end", "upload", "log-out")  # requests the hub can take later
+OUTBOX_MIN_BACKOFF: float = 1  # seconds before the first retry of a failed replay
+OUTBOX_MAX_BACKOFF: float = 60  # the longest the replayer waits between two attempts
+OUTBOX_COMPACT_AFTER: int = 256  # delivered entries kept in the file before it is compacted
+
+PENDING: str = "delivered_at IS NULL AND rejected_at IS NULL"
+
+OUTBOX_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    endpoint TEXT NOT NULL,
+    unit_id TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    delivered_at REAL,
+    rejected_at REAL,
+    reply TEXT
+)
+"""
+
+
+class OutboxEntry(tp.NamedTuple):
+    key: str  # idempotency key, the same on every attempt
+    endpoint: str
+    unit_id: tp.Optional[str]
+    payload: RequestPayload
+    created_at: float
+
+
+class Outbox:
+    """
+    a write-ahead log of the requests that change the state of the hub.
+    while the hub is reachable and nothing is queued the requests are sent right away, otherwise they are
+    written to an SQLite file and confirmed at once. a background replayer then sends them in order,
+    backing off exponentially while the hub stays unreachable
+    """
+
+    def __init__(self, hub: HubClient, path: str) -> None:
+        self._hub: HubClient = hub
+        self._db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(OUTBOX_SCHEMA)
+        self._add_missing_columns()
+        self._db_lock: Lock = Lock()
+        self._counter_lock: Lock = Lock()
+
+        self._writes: "Queue[tp.Tuple[OutboxEntry, Future[None]]]" = Queue()
+        self._queued: Event = Event()
+        self._backlog: int = self._count(PENDING)  # entries written or being written, not sent yet
+        self._delivered: int = self._count("delivered_at IS NOT NULL")  # delivered entries still in the file
+        self._rejected: int = self._count("rejected_at IS NOT NULL")  # entries the hub turned down, kept for review
+        self.batches_written: int = 0
+        self.last_error: tp.Optional[str] = None
+
+        if self._backlog:
+            logger.info(f"Outbox holds {self._backlog} undelivered requests from the previous run")
+            self._queued.set()
+
+        Thread(target=self._write_entries, name="outbox-writer", daemon=True).start()
+        Thread(target=self._replay, name="outbox-replayer", daemon=True).start()
+
+    def _add_missing_columns(self) -> None:
+        """bring an outbox file written before rejections were kept up to date"""
+        columns: tp.Set[str] = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+
+        for column in ("rejected_at REAL", "reply TEXT"):
+            if column.split()[0] not in columns:
+                self._db.execute(f"ALTER TABLE outbox ADD COLUMN {column}")
+
+    @property
+    def backlog(self) -> int:
+        return self._backlog
+
+    @property
+    def rejected(self) -> int:
+        return self._rejected
+
+    def _count_backlog(self, change: int) -> None:
+        with self._counter_lock:
+            self._backlog += change
+
+    def _count(self, condition: str) -> int:
+        with self._db_lock:
+            count: int = self._db.execute(f"SELECT COUNT(*) FROM outbox WHERE {condition}").fetchone()[0]
+            return count
+
+    def send(self, endpoint: str, payload: RequestPayload, unit_id: tp.Optional[str] = None) -> RequestPayload:
+        """deliver the request now if nothing is queued ahead of it, otherwise queue it and confirm"""
+        entry = OutboxEntry(str(uuid4()), endpoint, unit_id, payload, time())
+
+        if not self._backlog:
+            try:
+                return self._hub.request(endpoint, payload, unit_id, entry.key)
+            except BackendUnreachableError as E:
+                logger.warning(f"Hub unreachable, queueing the {endpoint} request: {E}")
+
+        self.append(entry)
+        return {"status": True, "comment": "Request queued for delivery to the hub"}
+
+    def append(self, entry: OutboxEntry) -> None:
+        """write the entry to the outbox and wait until it is on the disk"""
+        written: Future[None] = Future()
+        self._count_backlog(1)
+        self._writes.put((entry, written))
+
+        try:
+            written.result()
+        except Exception:
+            self._count_backlog(-1)
+            raise
+
+        logger.info(f"Queued the {entry.endpoint} request {entry.key}. {self._backlog} requests in the outbox")
+
+    def _write_entries(self) -> None:
+        """
+        commit the entries in batches. whatever gets queued while a commit is being synced to the disk
+        goes into the next one, so a burst of requests costs one fsync instead of one each
+        """
+        while True:
+            batch: tp.List[tp.Tuple[OutboxEntry, Future[None]]] = [self._writes.get()]
+
+            try:
+                while True:
+                    batch.append(self._writes.get_nowait())
+            except Empty:
+                pass
+
+            rows = [(e.key, e.endpoint, e.unit_id, json.dumps(e.payload), e.created_at) for e, _ in batch]
+
+            try:
+                with self._db_lock:
+                    with self._db:
+                        self._db.execute("BEGIN")
+                        self._db.executemany(
+                            "INSERT INTO outbox (key, endpoint, unit_id, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                            rows,
+                        )
+            except Exception as E:
+                logger.error(f"Failed to write {len(batch)} requests to the outbox: {E}")
+                for _, written in batch:
+                    written.set_exception(E)
+                continue
+
+            self.batches_written += 1
+            for _, written in batch:
+                written.set_result(None)
+            self._queued.set()
+
+    def _oldest(self) -> tp.Optional[OutboxEntry]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT key, endpoint, unit_id, payload, created_at FROM outbox "
+                f"WHERE {PENDING} ORDER BY seq LIMIT 1"
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        key, endpoint, unit_id, payload, created_at = row
+        return OutboxEntry(key, endpoint, unit_id, json.loads(payload), created_at)
+
+    def _replay(self) -> None:
+        """send the queued entries one by one in the order they were written"""
+        backoff: float = OUTBOX_MIN_BACKOFF
+
+        while True:
+            entry: tp.Optional[OutboxEntry] = self._oldest()
+
+            if entry is None:
+                self._compact()
+                self._queued.wait()
+                self._queued.clear()
+                continue
+
+            reply: tp.Optional[RequestPayload] = self._attempt(entry)
+
+            if reply is None:
+                logger.warning(f"Failed to replay the {entry.endpoint} request {entry.key}, retrying in {backoff} s")
+                sleep(backoff)
+                backoff = min(backoff * 2, OUTBOX_MAX_BACKOFF)
+                continue
+
+            backoff = OUTBOX_MIN_BACKOFF
+            self.last_error = None
+
+            # a request the hub has turned down will not be accepted by sending it again either
+            if not reply.get("status", True):
+                self._reject(entry, reply)
+                continue
+
+            with self._db_lock:
+                self._db.execute("UPDATE outbox SET delivered_at = ? WHERE key = ?", (time(), entry.key))
+
+            with self._counter_lock:
+                self._backlog -= 1
+                self._delivered += 1
+
+            logger.info(f"Replayed the {entry.endpoint} request {entry.key}. {self._backlog} requests left")
+
+    def _attempt(self, entry: OutboxEntry) -> tp.Optional[RequestPayload]:
+        """send the entry once. None if the hub could not take it and it has to be sent again"""
+        try:
+            return self._hub.request(entry.endpoint, entry.payload, entry.unit_id, entry.key)
+        except BackendUnreachableError as E:
+            self.last_error = str(E)
+
+        with self._db_lock:
+            self._db.execute("UPDATE outbox SET attempts = attempts + 1 WHERE key = ?", (entry.key,))
+
+        return None
+
+    def _reject(self, entry: OutboxEntry, reply: RequestPayload) -> None:
+        """
+        keep an entry the hub has turned down out of the replay. the operator was told it was queued,
+        so it stays in the file with the reply until someone looks into it
+        """
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE outbox SET rejected_at = ?, reply = ? WHERE key = ?", (time(), json.dumps(reply), entry.key)
+            )
+
+        with self._counter_lock:
+            self._backlog -= 1
+            self._rejected += 1
+
+        logger.error(f"Hub rejected the replayed {entry.endpoint} request {entry.key}: {reply}")
+
+    def _compact(self) -> None:
+        """drop the delivered entries and shrink the file once enough of them have piled up. rejected ones stay"""
+        with self._counter_lock:
+            delivered: int = self._delivered
+
+        if delivered < OUTBOX_COMPACT_AFTER:
+            return
+
+        with self._db_lock:
+            self._db.execute("DELETE FROM outbox WHERE delivered_at IS NOT NULL")
+            self._db.execute("VACUUM")
+
+        with self._counter_lock:
+            self._delivered -= delivered
+
+        logger.debug(f"Compacted the outbox, dropped {delivered} delivered requests")
+
+    def status(self) -> RequestPayload:
+        """describe the backlog of the outbox"""
+        oldest: tp.Optional[OutboxEntry] = self._oldest()
+        return {
+            "backlog": self._backlog,
+            "rejected": self._rejected,
+            "oldest_request": oldest.endpoint if oldest is not None else None,
+            "oldest_queued_at": dt.fromtimestamp(oldest.created_at).isoformat() if oldest is not None else None,
+            "batches_written": self.batches_written,
+            "last_error": self.last_error,
+        }
@@ -6,9 +6,10 @@ import subprocess
 import sys
 import threading
 import typing as tp
+from concurrent.futures import Future
 from random import randint
+from time import monotonic
 
-import requests
 import yaml
 from loguru import logger
 
@@ -16,6 +17,8 @@ from . import Alerts, Views
 from .Display import Display
 from .Employee import Employee
 from .Exceptions import BackendUnreachableError
+from .HubClient import HubClient
+from .Outbox import Outbox
 from .State import AuthorizedIdling, AwaitLogin, ProductionStageOngoing, State
 from .Types import AddInfo, Config, RequestPayload
 from ._Singleton import SingletonMeta
@@ -26,9 +29,29 @@ class Spoke(metaclass=SingletonMeta):
 
     def __init__(self) -> None:
         self.config: Config = self._get_config()
-        self.associated_unit_internal_id: tp.Optional[str] = None
+        self._associated_unit_internal_id: tp.Optional[str] = None
+        self.operation_started_at: tp.Optional[float] = None  # monotonic time the ongoing operation started at
         self.state: State = AwaitLogin(self)
         self._state_thread_list: tp.List[threading.Thread] = []
+        self.hub: HubClient = HubClient(self.hub_url, self.number, float(self.config["endpoints"]["warm_up_after"]))
+        self.hub.warm_up()
+        self.outbox: Outbox = Outbox(self.hub, str(self.config["endpoints"]["outbox_path"]))
+
+        # the last workbench status read from the hub and the request for it that is in flight, if any
+        self._status_lock: threading.Lock = threading.Lock()
+        self._status: tp.Optional[RequestPayload] = None
+        self._status_read_at: float = 0.0
+        self._status_request: tp.Optional[Future[RequestPayload]] = None
+        self._status_generation: int = 0  # bumped on every invalidation so that outdated replies are not cached
+
+    @property
+    def associated_unit_internal_id(self) -> tp.Optional[str]:
+        return self._associated_unit_internal_id
+
+    @associated_unit_internal_id.setter
+    def associated_unit_internal_id(self, unit_internal_id: tp.Optional[str]) -> None:
+        self._associated_unit_internal_id = unit_internal_id
+        self.operation_started_at = monotonic() if unit_internal_id is not None else None
 
     @property
     def operation_ongoing(self) -> bool:
@@ -58,14 +81,51 @@ class Spoke(metaclass=SingletonMeta):
 
     @property
     def workbench_status(self) -> RequestPayload:
-        url: str = f"{self.hub_url}/api/workbench/{self.number}/status"
+        """
+        the workbench status as the hub sees it. a status read recently enough is reused
+        and concurrent readers wait for a single request to the hub instead of sending their own
+        """
+        ttl: float = float(self.config["endpoints"]["status_ttl"])
+
+        with self._status_lock:
+            if self._status is not None and monotonic() - self._status_read_at < ttl:
+                return self._status
+
+            status_request: tp.Optional[Future[RequestPayload]] = self._status_request
+            if status_request is not None:
+                leader: bool = False
+            else:
+                leader = True
+                status_request = self._status_request = Future()
+                generation: int = self._status_generation
+
+        if not leader:
+            return status_request.result()
+
+        # whatever happens, the readers waiting on the request must get an outcome and the next read a new request
         try:
-            workbench_status: RequestPayload = requests.get(url, timeout=1).json()
-            return workbench_status
-        except Exception as E:
-            message = f"Backend unreachable: {E}"
-            logger.error(message)
-            raise BackendUnreachableError(message)
+            status: RequestPayload = self.hub.request("status")
+        except BaseException as E:
+            if isinstance(E, BackendUnreachableError):
+                logger.error(f"Backend unreachable: {E}")
+            status_request.set_exception(E)
+            raise
+        else:
+            with self._status_lock:
+                if generation == self._status_generation:
+                    self._status, self._status_read_at = status, monotonic()
+            status_request.set_result(status)
+        finally:
+            with self._status_lock:
+                self._status_request = None
+
+        return status
+
+    def invalidate_workbench_status(self) -> None:
+        """forget the cached workbench status, the next read goes to the hub"""
+        with self._status_lock:
+            self._status = None
+            self._status_generation += 1
 
     @property
     def disable_id_validation(self) -> bool:
@@ -88,11 +148,18 @@ class Spoke(metaclass=SingletonMeta):
             logger.debug(f"Configuration dict: {config_f}")
             return config_f
 
-    def sync_login_status(self, no_feedback: bool = False) -> None:
+    def sync_login_status(
+        self, no_feedback: bool = False, workbench_status: tp.Optional[RequestPayload] = None
+    ) -> None:
         """resolve conflicts in login status between backend and local data"""
         try:
-            # get data from the backend
-            workbench_status: RequestPayload = Spoke().workbench_status
+            # the hub's idea of who is logged in is out of date until it gets the requests queued in the outbox
+            if self.outbox.backlog:
+                raise BackendUnreachableError(f"{self.outbox.backlog} requests are yet to be delivered to the hub")
+
+            # get data from the backend unless the caller has just done so
+            if workbench_status is None:
+                workbench_status = Spoke().workbench_status
             is_logged_in: bool = bool(workbench_status["employee_logged_in"])
 
             # identify conflicts and treat accordingly
@@ -174,11 +241,12 @@ class Spoke(metaclass=SingletonMeta):
 
     def handle_rfid_event(self, event_dict: RequestPayload) -> None:
         """RFID event handling"""
-        # resolve sync conflicts
+        # resolve sync conflicts, unless the hub is yet to get our own requests from the outbox
         try:
-            workbench_status: RequestPayload = self.workbench_status
-            if not Employee().is_authorized == workbench_status["employee_logged_in"]:
-                self.sync_login_status()
+            if not self.outbox.backlog:
+                workbench_status: RequestPayload = self.workbench_status
+                if not Employee().is_authorized == workbench_status["employee_logged_in"]:
+                    self.sync_login_status(workbench_status=workbench_status)
         except BackendUnreachableError as E:
             logger.error(f"Failed to handle RFID event: {E}, event: {event_dict}")
             pass
@@ -3,13 +3,13 @@ from __future__ import annotations
 import typing as tp
 from abc import ABC, abstractmethod
 
-import requests
 from loguru import logger
 
 from . import Alerts, ViewBase, Views
 from .Display import Display
 from .Employee import Employee
 from .Exceptions import BackendUnreachableError, StateForbiddenError
+from .Outbox import OUTBOX_ENDPOINTS
 from .Types import AddInfo, RequestPayload
 
 if tp.TYPE_CHECKING:
@@ -74,6 +74,7 @@ class State(ABC):
             name_: str = str(response_data["employee_data"]["name"])
             position_: str = str(response_data["employee_data"]["position"])
             Employee().log_in(position_, name_, rfid_card_id)
+            self._spoke.invalidate_workbench_status()
             Display().render_view(Alerts.SuccessfulAuthorizationAlert)
             self.context.apply_state(AuthorizedIdling)
         else:
@@ -100,6 +101,7 @@ class State(ABC):
                 )
             ):
                 Employee().log_out()
+                self._spoke.invalidate_workbench_status()
                 Display().render_view(Alerts.SuccessfulLogOutAlert)
                 self.context.apply_state(AwaitLogin)
             else:
@@ -116,7 +118,6 @@ class State(ABC):
         self._spoke.associated_unit_internal_id = barcode_string
 
         if not self._spoke.disable_barcode_validation:
-            url = f"{self._spoke.hub_url}/api/unit/{barcode_string}/start"
             payload = {
                 "workbench_no": self._spoke.number,
                 "production_stage_name": self._spoke.config["general"]["production_stage_name"],
@@ -124,7 +125,7 @@ class State(ABC):
             }
 
             try:
-                response: RequestPayload = self._send_request_to_backend(url, payload)
+                response: RequestPayload = self._send_request_to_backend("start", payload, barcode_string)
                 if not response["status"]:
                     logger.error(response)
                     Display().render_view(Alerts.UnitNotFoundAlert)
@@ -143,13 +144,12 @@ class State(ABC):
         if self._spoke.disable_barcode_validation:
             self.context.apply_state(AuthorizedIdling)
             return
-        url = f"{self._spoke.hub_url}/api/unit/{barcode_string}/end"
         payload = {
             "workbench_no": self._spoke.number,
             "additional_info": additional_info if additional_info else {},
         }
         try:
-            self._send_request_to_backend(url, payload)
+            self._send_request_to_backend("end", payload, barcode_string)
             if self._spoke.config["general"]["send_upload_request"]:
                 self._send_upload_request(barcode_string)
             Display().render_view(Alerts.OperationEndedAlert)
@@ -168,13 +168,15 @@ class State(ABC):
 
         raise StateForbiddenError(msg)
 
-    @staticmethod
-    def _send_request_to_backend(url: str, payload: RequestPayload) -> RequestPayload:
-        """try sending request, display error message on failure"""
+    def _send_request_to_backend(
+        self, endpoint: str, payload: RequestPayload, unit_internal_id: tp.Optional[str] = None
+    ) -> RequestPayload:
+        """try sending request, display error message on failure. requests the hub can take later are queued"""
         try:
-            response = requests.post(url=url, json=payload, timeout=1)
-            response_data = response.json()
-            return dict(response_data)
+            if endpoint in OUTBOX_ENDPOINTS:
+                return self._spoke.outbox.send(endpoint, payload, unit_internal_id)
+
+            return self._spoke.hub.request(endpoint, payload, unit_internal_id)
 
         except Exception as E:
             logger.error(f"Backend unreachable: {E}")
@@ -188,23 +190,20 @@ class State(ABC):
 
     def _send_log_out_request(self) -> None:
         payload = {"workbench_no": self._spoke.number}
-        url = f"{self._spoke.hub_url}/api/employee/log-out"
-        self._send_request_to_backend(url, payload)
+        self._send_request_to_backend("log-out", payload)
 
     def _send_upload_request(self, unit_internal_id: str) -> RequestPayload:
         """send a request to upload the unit data"""
         payload = {"workbench_no": self._spoke.number}
-        url = f"{self._spoke.hub_url}/api/unit/{unit_internal_id}/upload"
-        return self._send_request_to_backend(url, payload)
+        return self._send_request_to_backend("upload", payload, unit_internal_id)
 
     def _send_log_in_request(self, rfid_card_no: str) -> RequestPayload:
         payload = {
             "workbench_no": self._spoke.number,
             "employee_rfid_card_no": rfid_card_no,
         }
-        url = f"{self._spoke.hub_url}/api/employee/log-in"
         try:
-            return self._send_request_to_backend(url, payload)
+            return self._send_request_to_backend("log-in", payload)
         except BackendUnreachableError:
             return {"status": False, "comment": "Backend is unreachable"}
 
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import typing as tp
+from functools import lru_cache
+
+from .Fonts import FontRegistry
+from ._Singleton import SingletonMeta
+
+if tp.TYPE_CHECKING:
+    from PIL.ImageFont import FreeTypeFont
+
+LINE_SPACING: int = 4  # ImageDraw's default spacing between the lines of a multiline text
+MIN_FONT_SIZE: int = 8  # fitting never shrinks text below this size
+
+
+class TextMetrics(metaclass=SingletonMeta):
+    """
+    measures text the way ImageDraw lays it out without allocating a scratch canvas.
+    every measurement is memoized by font face, size and text
+    """
+
+    @staticmethod
+    def _font(path: str, size: int) -> FreeTypeFont:
+        return FontRegistry().get(path, size)
+
+    @lru_cache(maxsize=2048)
+    def _size(self, path: str, size: int, text: str) -> tp.Tuple[int, int]:
+        if "\n" not in text:
+            width, height = self._font(path, size).getsize(text)
+            return width, height
+
+        # mirrors ImageDraw.multiline_textsize
+        lines: tp.List[str] = text.split("\n")
+        line_spacing: int = self._size(path, size, "A")[1] + LINE_SPACING
+        max_width: int = max(self._size(path, size, line)[0] for line in lines)
+        return max_width, len(lines) * line_spacing - LINE_SPACING
+
+    @lru_cache(maxsize=2048)
+    def _offset(self, path: str, size: int, text: str) -> tp.Tuple[int, int]:
+        offset_w, offset_h = self._font(path, size).getoffset(text)
+        return offset_w, offset_h
+
+    @lru_cache(maxsize=1024)
+    def _center(self, path: str, size: int, text: str, width: int, height: int) -> tp.Tuple[int, int]:
+        txt_w, txt_h = self._size(path, size, text)
+
+        # https://stackoverflow.com/questions/59008322/pillow-imagedraw-text-coordinates-to-center/59008967#59008967
+        offset_w, offset_h = self._offset(path, size, text)
+        txt_h += offset_h
+        txt_w += offset_w
+
+        return int((width - txt_w) / 2), int((height - txt_h) / 2)
+
+    def size(self, text: str, font: FreeTypeFont) -> tp.Tuple[int, int]:
+        """same as ImageDraw.textsize"""
+        return self._size(font.path, font.size, text)
+
+    def offset(self, text: str, font: FreeTypeFont) -> tp.Tuple[int, int]:
+        """same as FreeTypeFont.getoffset"""
+        return self._offset(font.path, font.size, text)
+
+    def width(self, text: str, font: FreeTypeFont) -> int:
+        """visible width of the text including its horizontal offset"""
+        return self.size(text, font)[0] + self.offset(text, font)[0]
+
+    def center(self, text: str, font: FreeTypeFont, width: int, height: int) -> tp.Tuple[int, int]:
+        """upper left corner of the text centered in a box of the provided size"""
+        return self._center(font.path, font.size, text, width, height)
+
+    def wrap(self, text: str, font: FreeTypeFont, max_width: int) -> str:
+        """break the text into lines greedily, word by word, so that every line fits into max_width"""
+        space_w: int = self.size(" ", font)[0]
+        lines: tp.List[str] = []
+        line: str = ""
+        line_w: int = 0
+
+        for word in text.split():
+            word_w: int = self.width(word, font)
+
+            if line and line_w + space_w + word_w > max_width:
+                lines.append(line)
+                line, line_w = word, word_w
+            elif line:
+                line, line_w = f"{line} {word}", line_w + space_w + word_w
+            else:
+                line, line_w = word, word_w
+
+        lines.append(line)
+        return "\n".join(lines)
+
+    def fit(self, text: str, font: FreeTypeFont, max_width: int, max_lines: int = 2) -> tp.Tuple[str, FreeTypeFont]:
+        """wrap the text into max_lines at most, shrinking the font if even that is not enough"""
+        fitted: str = self.wrap(text, font, max_width)
+        size: int = font.size
+
+        while size > MIN_FONT_SIZE and not self._is_fitting(fitted, font, max_width, max_lines):
+            size -= 1
+            font = self._font(font.path, size)
+            fitted = self.wrap(text, font, max_width)
+
+        return fitted, font
+
+    def shrink(self, text: str, font: FreeTypeFont, max_width: int) -> FreeTypeFont:
+        """get the largest size (up to the current one) at which every line of the text fits into max_width"""
+        while font.size > MIN_FONT_SIZE and not self._is_fitting(text, font, max_width, text.count("\n") + 1):
+            font = self._font(font.path, font.size - 1)
+
+        return font
+
+    def _is_fitting(self, text: str, font: FreeTypeFont, max_width: int, max_lines: int) -> bool:
+        lines: tp.List[str] = text.split("\n")
+        return len(lines) <= max_lines and all(self.width(line, font) <= max_width for line in lines)
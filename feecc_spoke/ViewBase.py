@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-import os
 import typing as tp
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from datetime import datetime as dt
-from time import sleep, time
+from dataclasses import dataclass, fields
+from time import time
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from loguru import logger
 
+from .Fonts import FontRegistry
+from .FrameCache import FrameCache
+from .Icons import ICON_SIZE, IconAtlas
+from .Layout import LayoutPlan, Region, compile_layout
+from .TextMetrics import TextMetrics
+
 if tp.TYPE_CHECKING:
     from .Display import Display
     from PIL.ImageFont import FreeTypeFont
@@ -27,10 +31,17 @@ BG_COLOR: int = 255
 SMALL_FONT_SIZE: int = 11
 MEDIUM_FONT_SIZE: int = 20
 LARGE_FONT_SIZE: int = 36
+FONT_SIZES: tp.Tuple[int, ...] = (SMALL_FONT_SIZE, MEDIUM_FONT_SIZE, LARGE_FONT_SIZE)
 
 # misc
 ALERT_DISPLAY_TIME: int = 1
 
+# scheduling
+INFO_PRIORITY: int = 0
+ERROR_PRIORITY: int = 1
+ALERT_TTL: float = 5  # seconds an informational alert may wait in the queue before it is no longer relevant
+ERROR_ALERT_TTL: float = 15
+
 
 class View(ABC):
     """
@@ -38,6 +49,17 @@ class View(ABC):
     each view is responsible for an image drawn on the screen
     """
 
+    # the frame of a static view depends only on its frame key, so it is prerendered at startup
+    static: bool = False
+
+    # transient views (alerts) are shown on the way to a terminal screen which stays until replaced
+    transient: bool = False
+    priority: int = INFO_PRIORITY
+    ttl: tp.Optional[float] = None  # seconds the view may wait in the queue
+
+    # the regions of a view drawn from a layout plan, see _get_layout
+    layout: tp.Tuple[Region, ...] = ()
+
     def __init__(self, context: Display) -> None:
         # associated display parameters
         self._display: Display = context
@@ -48,79 +70,67 @@ class View(ABC):
         self._width: int = self._epd.height
 
         # fonts
-        logger.debug(f"Using font {os.path.basename(FONT_PATH)}")
-        self._font_s: FreeTypeFont = ImageFont.truetype(FONT_PATH, SMALL_FONT_SIZE)
-        self._font_m: FreeTypeFont = ImageFont.truetype(FONT_PATH, MEDIUM_FONT_SIZE)
-        self._font_l: FreeTypeFont = ImageFont.truetype(FONT_PATH, LARGE_FONT_SIZE)
+        fonts = FontRegistry()
+        self._font_s: FreeTypeFont = fonts.get(FONT_PATH, SMALL_FONT_SIZE)
+        self._font_m: FreeTypeFont = fonts.get(FONT_PATH, MEDIUM_FONT_SIZE)
+        self._font_l: FreeTypeFont = fonts.get(FONT_PATH, LARGE_FONT_SIZE)
 
     def _get_image(self, fill: int = BG_COLOR) -> Image:
         return Image.new("1", (self._width, self._height), fill)
 
-    def _save_image(self, image: Image) -> None:
-        """saves image if specified in the config"""
-        if not os.path.isdir("img"):
-            os.mkdir("img")
+    def _get_layout(self) -> LayoutPlan:
+        """the layout of the view compiled for the current screen size"""
+        return compile_layout(FONT_PATH, self.layout, (self._width, self._height))
 
-        image_name = f"{IMAGE_DIRECTORY_PATH}/{self.name}-{str(dt.now()).split('.')[0]}.png"
-        image.save(image_name)
-        logger.info(f"Saved view {self.name} as '{image_name.split('/')[-1]}'")
+    def _pack(self, image: Image) -> bytes:
+        """turn the image into a packed frame ready to be sent to the panel"""
+        return bytes(self._epd.getbuffer(image, self._rotate))
 
-    def _render_image(self, image: Image) -> None:
-        """display the provided image and save it if needed"""
-        start_time: float = time()
+    @abstractmethod
+    def _compose(self) -> Image:
+        """draw the view onto a new image"""
+        raise NotImplementedError
+
+    @property
+    def frame_key(self) -> tp.Optional[tp.Hashable]:
+        """everything the frame of the view depends on. views returning None are never cached"""
+        return None
 
-        if self._display.spoke_config["developer"]["render_images"]:
-            self._save_image(image)
+    def get_frame(self) -> bytes:
+        """get the packed frame of the view, composing it only if it is not cached yet"""
+        key: tp.Optional[tp.Hashable] = self.frame_key
 
-        if self._rotate:
-            image = image.rotate(180)
+        if key is None:
+            return self._pack(self._compose())
+
+        return FrameCache().get_or_render(key, lambda: self._pack(self._compose()))
+
+    def prepare(self) -> None:
+        """compose the frame ahead of time so that displaying the view only has to send it"""
+        if self.frame_key is not None:
+            self.get_frame()
+
+    def _render_frame(self) -> None:
+        """display the frame of the view"""
+        start_time: float = time()
+        frame: bytes = self.get_frame()
+        self._display.metrics.last_compose_time = round(time() - start_time, 3)
 
         logger.info(f"Rendering {self.name} view on the screen")
-        self._epd.display(self._epd.getbuffer(image))
+        self._display.show_frame(frame)
 
         end_time: float = time()
         logger.debug(f"Image rendering took {round(end_time-start_time, 3)} s.")
 
     def _align_center(self, text: str, font: FreeTypeFont) -> tp.Tuple[int, int]:
         """get the coordinates of the upper left corner for the centered text"""
-        sample_image = self._get_image()
-        sample_draw = ImageDraw.Draw(sample_image)
-        txt_w, txt_h = sample_draw.textsize(text, font)
-
-        # https://stackoverflow.com/questions/59008322/pillow-imagedraw-text-coordinates-to-center/59008967#59008967
-        offset_w, offset_h = font.getoffset(text)
-        txt_h += offset_h
-        txt_w += offset_w
-
-        text_position = int((self._width - txt_w) / 2), int((self._height - txt_h) / 2)
-        return text_position
-
-    def _ensure_fitting(self, text: str, font: FreeTypeFont, min_offset: int = 5) -> str:
-        """make sure provided text fits on the screen and add line breaks if it doesn't"""
-        modified_text: str = text
-        sample_image = self._get_image()
-        sample_draw = ImageDraw.Draw(sample_image)
-
-        def _is_fitting(message: str) -> bool:
-            txt_w, _ = sample_draw.textsize(message, font)
-            offset_w, _ = font.getoffset(message)
-            txt_w += offset_w
-            msg_w: int = txt_w + (min_offset * 2)
-            return msg_w <= self._width
-
-        def _insert_break(msg: str, break_pos_: int) -> str:
-            msg_: tp.List[str] = msg.split()
-            msg_.insert(break_pos_, "\n")
-            new_msg: str = " ".join(msg_)
-            new_msg.replace(" \n ", "\n")
-            return new_msg
-
-        break_pos: int = len(text.split()) - 1
-        while not _is_fitting(modified_text) and break_pos >= 0:
-            modified_text = _insert_break(text, break_pos)
-            break_pos -= 1
-
-        return modified_text
+        return TextMetrics().center(text, font, self._width, self._height)
+
+    def _fit_text(
+        self, text: str, font: FreeTypeFont, min_offset: int = 5, max_lines: int = 2
+    ) -> tp.Tuple[str, FreeTypeFont]:
+        """break the text into lines to fit the screen, shrinking the font if there are too many of them"""
+        return TextMetrics().fit(text, font, self._width - min_offset * 2, max_lines)
 
     @property
     def _rotate(self) -> bool:
@@ -130,15 +140,30 @@ class View(ABC):
     def name(self) -> str:
         return self.__class__.__name__
 
+    @property
+    def onscreen_time(self) -> float:
+        """seconds the view stays on the screen before a view of the same priority may replace it"""
+        return 0.0
+
     @abstractmethod
     def display(self) -> None:
         """a universal method that constructs the view and draws it onto a screen"""
         raise NotImplementedError
 
+    def tick(self) -> tp.Optional[float]:
+        """
+        update a long-running view. called right after the view is displayed and then at every returned
+        (monotonic) deadline until it returns None or another view preempts it
+        """
+        return None
+
 
 class Alert(View):
     """display a message with an icon (an alert)"""
 
+    transient = True
+    ttl: tp.Optional[float] = ALERT_TTL
+
     def __init__(
         self,
         context: Display,
@@ -155,40 +180,49 @@ class Alert(View):
         self._font: FreeTypeFont = font or self._font_m
         self._onscreen_time: int = onscreen_time or ALERT_DISPLAY_TIME
 
+    @property
+    def frame_key(self) -> tp.Optional[tp.Hashable]:
+        return self.name, self._image_path, self._message, self._footer, self._font.size, self._rotate
+
+    @property
+    def onscreen_time(self) -> float:
+        return float(self._onscreen_time)
+
     def display(self) -> None:
+        self._render_frame()
+
+    def _compose(self) -> Image:
         # init image
         alert_screen = self._get_image()
         alert_draw = ImageDraw.Draw(alert_screen)
 
         # draw the icon
-        icon = Image.open(self._image_path)
-        img_w, img_h = (50, 50)
-        icon = icon.resize((img_w, img_h))
+        img_w, img_h = ICON_SIZE
+        icon = IconAtlas().get(self._image_path, ICON_SIZE)
         alert_screen.paste(icon, (20, int((self._height - img_h) / 2)))
 
-        # draw the alert message
+        # draw the alert message, shrinking the font if it would be cut off by the screen edge
         message: str = self._message
-        _, txt_h = self._align_center(message, self._font)
-        text_position = 20 + img_w + 10, txt_h
-        alert_draw.text(text_position, message, font=self._font, fill=MAIN_COLOR, align="center")
+        text_x: int = 20 + img_w + 10
+        message_font: FreeTypeFont = TextMetrics().shrink(message, self._font, self._width - text_x)
+        _, txt_h = self._align_center(message, message_font)
+        text_position = text_x, txt_h
+        alert_draw.text(text_position, message, font=message_font, fill=MAIN_COLOR, align="center")
 
         # draw the footer
         if self._footer is not None:
-            font = self._font_s
-            footer = self._ensure_fitting(self._footer, font, 10)
+            footer, font = self._fit_text(self._footer, self._font_s, 10)
             lines: int = footer.count("\n") + 1
             logger.debug(f"Alert footer: {footer} ({lines} lines)")
             footer_w, _ = self._align_center(footer, font=font)
-            _, footer_h = alert_draw.textsize(message, font)
+            _, footer_h = TextMetrics().size(message, font)
             if lines > 1:
-                _, offset_h = font.getoffset(message)
+                _, offset_h = TextMetrics().offset(message, font)
                 footer_h += offset_h
             footer_position = footer_w, self._height - footer_h
             alert_draw.text(footer_position, footer, font=font, fill=MAIN_COLOR, align="center")
 
-        # display the image
-        self._render_image(alert_screen)
-        sleep(self._onscreen_time)
+        return alert_screen
 
 
 @dataclass(frozen=True)
@@ -201,3 +235,8 @@ class Icon:
     warning: str = f"{_icon_dir}/warning.png"
     rfid: str = f"{_icon_dir}/rfid.png"
     barcode_scanner: str = f"{_icon_dir}/barcode.png"
+
+    @classmethod
+    def paths(cls) -> tp.List[str]:
+        """paths to all the icons"""
+        return [getattr(cls, field.name) for field in fields(cls) if not field.name.startswith("_")]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import typing as tp
+from threading import Condition
+from time import monotonic
+
+from loguru import logger
+
+from .Metrics import DisplayMetrics
+
+if tp.TYPE_CHECKING:
+    from .ViewBase import View
+
+
+class PendingView(tp.NamedTuple):
+    view: tp.Type[View]
+    enqueued_at: float
+
+
+class ViewQueue:
+    """
+    pending views ordered by what the screen should show next.
+    a terminal screen supersedes the pending ones, error alerts go ahead of informational ones
+    and alerts that have been waiting for longer than their time to live are dropped
+    """
+
+    def __init__(self, metrics: DisplayMetrics) -> None:
+        self._pending: tp.List[PendingView] = []
+        self._changed: Condition = Condition()
+        self._metrics: DisplayMetrics = metrics
+        self._closed: bool = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _update_depth(self) -> None:
+        self._metrics.queue_depth = len(self._pending)
+        self._metrics.max_queue_depth = max(self._metrics.max_queue_depth, len(self._pending))
+
+    def _drop(self, pending: PendingView, reason: str) -> None:
+        self._pending.remove(pending)
+        self._metrics.views_dropped += 1
+        logger.debug(f"View {pending.view.__name__} dropped from the queue: {reason}")
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """stop accepting views. the ones already staged are still handed out, then get() returns None"""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    def put(self, view: tp.Type[View]) -> bool:
+        """stage the view for rendering. returns False if it was dropped right away"""
+        with self._changed:
+            if self._closed:
+                logger.debug(f"View queue is closed. Dropping {view.__name__}.")
+                return False
+
+            if self._pending and self._pending[-1].view == view:
+                self._metrics.views_dropped += 1
+                logger.debug(f"View {view.__name__} is already pending rendering. Dropping task.")
+                return False
+
+            # only the latest terminal screen matters, the ones staged before it would be shown just to be replaced
+            if not view.transient:
+                for pending in [p for p in self._pending if not p.view.transient]:
+                    self._drop(pending, f"superseded by {view.__name__}")
+
+            self._pending.append(PendingView(view, monotonic()))
+            self._update_depth()
+            self._changed.notify_all()
+            return True
+
+    def _expire(self) -> None:
+        now: float = monotonic()
+
+        for pending in [p for p in self._pending if p.view.ttl is not None]:
+            if now - pending.enqueued_at > tp.cast(float, pending.view.ttl):
+                self._drop(pending, "expired")
+
+    def _next(self) -> tp.Optional[PendingView]:
+        # alerts may only jump ahead of other alerts, never past a terminal screen staged before them
+        candidates: tp.List[PendingView] = []
+
+        for pending in self._pending:
+            if not pending.view.transient:
+                if not candidates:
+                    return pending
+                break
+            candidates.append(pending)
+
+        return max(candidates, key=lambda p: p.view.priority) if candidates else None
+
+    def peek(self) -> tp.Optional[tp.Type[View]]:
+        """the view that will be rendered next"""
+        with self._changed:
+            pending: tp.Optional[PendingView] = self._next()
+            return pending.view if pending is not None else None
+
+    def get(self) -> tp.Optional[PendingView]:
+        """block until there is a view to render and take it. None once the queue is closed and drained"""
+        with self._changed:
+            while True:
+                self._expire()
+                pending: tp.Optional[PendingView] = self._next()
+                self._update_depth()
+
+                if pending is not None:
+                    self._pending.remove(pending)
+                    self._update_depth()
+                    return pending
+
+                if self._closed:
+                    return None
+
+                self._changed.wait()
+
+    def _preempts(self, priority: tp.Optional[int]) -> bool:
+        if self._closed:
+            return True
+
+        if priority is None:
+            return bool(self._pending)
+
+        return any(pending.view.priority > priority for pending in self._pending)
+
+    def wait(self, deadline: float, priority: tp.Optional[int] = None) -> bool:
+        """
+        block until the deadline or until a view is staged that preempts the one on the screen:
+        any view if no priority is provided, otherwise a view of a higher priority.
+        closing the queue preempts any view. True if preempted
+        """
+        with self._changed:
+            while not self._preempts(priority):
+                remaining: float = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+
+            return True
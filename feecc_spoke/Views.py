@@ -1,87 +1,127 @@
-from datetime import datetime as dt
+from __future__ import annotations
+
+import typing as tp
+from time import monotonic
 
 from loguru import logger
-from PIL import Image, ImageDraw
+from PIL import Image
+
+from .Layout import IconRegion, LayoutPlan, SlotRegion, TextRegion, Window
+from .ViewBase import LARGE_FONT_SIZE, MEDIUM_FONT_SIZE, SMALL_FONT_SIZE, Icon, View
 
-from .ViewBase import BG_COLOR, MAIN_COLOR, Icon, View
+if tp.TYPE_CHECKING:
+    from .Display import Display
 
 
 class LoginScreen(View):
     """displays login screen"""
 
+    static = True
+    layout = (
+        TextRegion("heading", text="FEECC Spoke v1", font_size=MEDIUM_FONT_SIZE, top=5),
+        IconRegion("rfid", path=Icon.rfid, left=35, below="heading", top=10),
+        TextRegion(
+            "message", text="Приложите\nпропуск\nк сканеру", font_size=SMALL_FONT_SIZE, left=95, below="heading", top=10
+        ),
+        SlotRegion(
+            "footer", font_size=SMALL_FONT_SIZE, below="rfid", top=3, samples=("spoke no.00. IPv4: 000.000.000.000",)
+        ),
+    )
+
+    def __init__(self, context: Display) -> None:
+        super().__init__(context)
+        self._footer: str = f"spoke no.{self._display.spoke_config['general']['workbench_no']}"
+        ipv4 = self._display.associated_spoke.ipv4
+
+        if ipv4 is not None:
+            self._footer += f". IPv4: {ipv4}"
+
+    @property
+    def frame_key(self) -> tp.Optional[tp.Hashable]:
+        return self.name, self._footer, self._rotate
+
     def display(self) -> None:
         logger.info("Display login screen")
+        self._render_frame()
 
-        # init image
-        login_screen = self._get_image()
-        login_screen_draw = ImageDraw.Draw(login_screen)
+    def _compose(self) -> Image.Image:
+        plan: LayoutPlan = self._get_layout()
+        login_screen = bytearray(plan.background)
+        plan.fill_slot(login_screen, "footer", self._footer)
+        return Image.frombytes("1", plan.size, bytes(login_screen))
 
-        # draw the heading
-        heading = "FEECC Spoke v1"
-        w, _ = self._align_center(heading, self._font_m)
-        _, h = login_screen_draw.textsize(heading, self._font_m)
-        login_screen_draw.text((w, 5), heading, font=self._font_m, fill=MAIN_COLOR)
 
-        # draw the RFID sign
-        rfid_image = Image.open(Icon.rfid)
-        rfid_image = rfid_image.resize((50, 50))
-        block_start = 10 + h + 5
-        login_screen.paste(rfid_image, (35, block_start))
+class OngoingOperationScreen(View):
+    """Displays the assembly timer"""
 
-        # draw the message
-        message = "Приложите\nпропуск\nк сканеру"
-        login_screen_draw.text((35 + 50 + 10, block_start), message, font=self._font_s, fill=MAIN_COLOR)
+    layout = (
+        TextRegion("heading", text="ИДЕТ ЗАПИСЬ", font_size=MEDIUM_FONT_SIZE, top=10),
+        SlotRegion("reading", font_size=LARGE_FONT_SIZE, top=30, samples=("00:00:00", "00:00")),
+        TextRegion(
+            "hint",
+            text="Для завершения сканировать\nштрихкод еще раз",
+            font_size=SMALL_FONT_SIZE,
+            top=67,
+            align="center",
+        ),
+    )
+
+    def __init__(self, context: Display) -> None:
+        super().__init__(context)
+        self._coarse_after: float = float(self._display.spoke_config["screen"]["timer_coarse_after"])
+        self._plan: LayoutPlan = self._get_layout()
+        self._frame: bytearray = bytearray()
+        self._message: str = ""
 
-        # draw the footer
-        footer = f"spoke no.{self._display.spoke_config['general']['workbench_no']}"
-        ipv4 = self._display.associated_spoke.ipv4
+    def display(self) -> None:
+        logger.info("Display assembly timer")
+        # the readings are drawn straight into the image bytes on every tick
+        self._frame = bytearray(self._plan.background)
 
-        if ipv4 is not None:
-            footer += f". IPv4: {ipv4}"
+    def tick(self) -> tp.Optional[float]:
+        spoke = self._display.associated_spoke
+        start_time: tp.Optional[float] = spoke.operation_started_at
 
-        w, _ = self._align_center(footer, self._font_s)
-        text_position = (w, block_start + 50 + 3)
-        login_screen_draw.text(text_position, footer, font=self._font_s, fill=MAIN_COLOR)
+        if not spoke.operation_ongoing or start_time is None:
+            return None
 
-        # display the image
-        self._render_image(login_screen)
+        elapsed: float = monotonic() - start_time
+        message, period = self._get_timer_text(elapsed, self._coarse_after)
 
+        if message != self._message:
+            self._draw_reading(message)
 
-class OngoingOperationScreen(View):
-    """Displays the assembly timer"""
+        # come back the moment the reading changes next
+        return start_time + (elapsed // period + 1) * period
 
-    def display(self) -> None:
-        logger.info("Display assembly timer")
-        time_image = self._get_image()
-        time_draw = ImageDraw.Draw(time_image)
-
-        message = "ИДЕТ ЗАПИСЬ"
-        w, _ = self._align_center(message, self._font_m)
-        time_draw.text((w, 10), message, font=self._font_m, fill=MAIN_COLOR)
-
-        message = "Для завершения сканировать\nштрихкод еще раз"
-        w, _ = self._align_center(message, self._font_s)
-        text_position = w, 67
-        time_draw.text(text_position, message, font=self._font_s, fill=MAIN_COLOR, align="center")
-        start_time = dt.now()
-
-        while self._display.associated_spoke.operation_ongoing:
-            timer_delta = dt.now() - start_time
-            timer = dt.utcfromtimestamp(timer_delta.total_seconds())
-            message = timer.strftime("%H:%M:%S")
-
-            w, h = time_draw.textsize(message, self._font_l)
-            nw_w, _ = self._align_center(message, self._font_l)
-            time_draw.rectangle((nw_w, 30, nw_w + w, 30 + h), fill=BG_COLOR)
-            time_draw.text((nw_w, 30), message, font=self._font_l, fill=MAIN_COLOR)
-            new_image = time_image.crop([nw_w, 30, nw_w + w, 30 + h])
-            time_image.paste(new_image, (nw_w, 30))
+    def _draw_reading(self, message: str) -> None:
+        """draw the timer reading into the frame and send it with a partial refresh"""
+        # once the first reading is on the glass, only the reading slot can change
+        hint: tp.Optional[Window] = None
 
+        if self._message:
+            hint = self._plan.slots["reading"].window
             if self._rotate:
-                time_image_rotated = time_image.rotate(180)
-                self._epd.DisplayPartial(self._epd.getbuffer(time_image_rotated))
-            else:
-                self._epd.DisplayPartial(self._epd.getbuffer(time_image))
+                hint = self._epd.rotate_window(hint)
+
+        self._plan.fill_slot(self._frame, "reading", message)
+        self._message = message
+        self._display.show_frame(self._pack(self._compose()), partial=True, hint=hint)
+
+    def _compose(self) -> Image.Image:
+        """the timer with the last reading drawn, the bare background before the first one"""
+        return Image.frombytes("1", self._plan.size, bytes(self._frame or self._plan.background))
+
+    @staticmethod
+    def _get_timer_text(elapsed: float, coarse_after: float) -> tp.Tuple[str, int]:
+        """format the elapsed time and tell how often the reading changes"""
+        hours, remainder = divmod(int(elapsed), 3600)
+        minutes, seconds = divmod(remainder, 60)
+
+        if elapsed >= coarse_after:
+            return f"{hours:02d}:{minutes:02d}", 60
+
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}", 1
 
 
 class BlankScreen(View):
@@ -89,7 +129,8 @@ class BlankScreen(View):
 
     def display(self) -> None:
         logger.info("Clearing the screen")
-        self._epd.init()
-        self._epd.Clear(0x00)  # fill with black to remove stuck pixels
-        self._epd.Clear(0xFF)  # fill with white
+        self._display.clear_panel()
         logger.debug("Finished clearing the screen")
+
+    def _compose(self) -> Image.Image:
+        return self._get_image()
@@ -38,480 +38,185 @@ from . import epdconfig
 EPD_WIDTH = 104
 EPD_HEIGHT = 212
 
+# Largest chunk handed to spidev in a single transfer (default spidev bufsiz)
+SPI_CHUNK_SIZE = 4096
+
+# BUSY wait limits: give up after the timeout, re-check the pin at least this often
+BUSY_TIMEOUT_MS = 10000
+BUSY_POLL_MS = 10
+
+# Reset settle time after waking from deep sleep (the cold init keeps the original 200 ms)
+WAKE_RESET_MS = 20
+
+# Waveform sets that can be loaded into the LUT registers
+FULL_REFRESH = "full"
+PARTIAL_REFRESH = "partial"
+
+# Lookup table to invert every byte of a plane in one C-level pass
+INVERT_TABLE = bytes(0xFF - i for i in range(256))
+
+# Lookup table to mirror the bits of every byte, used to turn packed planes by 180 degrees
+REVERSE_TABLE = bytes(int("{:08b}".format(i)[::-1], 2) for i in range(256))
+
 
 class EPD:
-    def __init__(self):
+    def __init__(self, busy_timeout_ms=BUSY_TIMEOUT_MS, busy_poll_ms=BUSY_POLL_MS):
         self.reset_pin = epdconfig.RST_PIN
         self.dc_pin = epdconfig.DC_PIN
         self.busy_pin = epdconfig.BUSY_PIN
         self.cs_pin = epdconfig.CS_PIN
         self.width = EPD_WIDTH
         self.height = EPD_HEIGHT
-
-    lut_vcomDC = [
-        0x00,
-        0x08,
-        0x00,
-        0x00,
-        0x00,
-        0x02,
-        0x60,
-        0x28,
-        0x28,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x14,
-        0x00,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x12,
-        0x12,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_ww = [
-        0x40,
-        0x08,
-        0x00,
-        0x00,
-        0x00,
-        0x02,
-        0x90,
-        0x28,
-        0x28,
-        0x00,
-        0x00,
-        0x01,
-        0x40,
-        0x14,
-        0x00,
-        0x00,
-        0x00,
-        0x01,
-        0xA0,
-        0x12,
-        0x12,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_bw = [
-        0x40,
-        0x17,
-        0x00,
-        0x00,
-        0x00,
-        0x02,
-        0x90,
-        0x0F,
-        0x0F,
-        0x00,
-        0x00,
-        0x03,
-        0x40,
-        0x0A,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0xA0,
-        0x0E,
-        0x0E,
-        0x00,
-        0x00,
-        0x02,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_wb = [
-        0x80,
-        0x08,
-        0x00,
-        0x00,
-        0x00,
-        0x02,
-        0x90,
-        0x28,
-        0x28,
-        0x00,
-        0x00,
-        0x01,
-        0x80,
-        0x14,
-        0x00,
-        0x00,
-        0x00,
-        0x01,
-        0x50,
-        0x12,
-        0x12,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_bb = [
-        0x80,
-        0x08,
-        0x00,
-        0x00,
-        0x00,
-        0x02,
-        0x90,
-        0x28,
-        0x28,
-        0x00,
-        0x00,
-        0x01,
-        0x80,
-        0x14,
-        0x00,
-        0x00,
-        0x00,
-        0x01,
-        0x50,
-        0x12,
-        0x12,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_vcom1 = [
-        0x00,
-        0x19,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_ww1 = [
-        0x00,
-        0x19,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_bw1 = [
-        0x80,
-        0x19,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_wb1 = [
-        0x40,
-        0x19,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
-
-    lut_bb1 = [
-        0x00,
-        0x19,
-        0x01,
-        0x00,
-        0x00,
-        0x01,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-        0x00,
-    ]
+        self.busy_timeout_ms = busy_timeout_ms
+        self.busy_poll_ms = busy_poll_ms
+        self.last_busy_ms = 0.0
+        self.busy_waited_ms = 0.0  # part of the current BUSY period already waited out in slices
+
+        # a refresh has been started without waiting for BUSY to release
+        self.refreshing = False
+        self.line_width = int(self.width / 8)
+        self.frame_size = self.line_width * self.height
+
+        # constant planes used by Clear(), built once instead of per call
+        self.black_frame = bytes([0x00]) * self.frame_size
+        self.white_frame = bytes([0xFF]) * self.frame_size
+
+        # last plane shown on the glass, used to find the region a partial refresh has to touch
+        self.frame = None
+        self.partial_mode = False
+
+        # waveform set (with its VCOM and border settings) currently held by the controller
+        self.loaded_lut = None
+
+        # register writes of the power-up sequence, built once and replayed by init() and wake()
+        self.power_registers = (
+            (0x01, bytes([0x03, 0x00, 0x2B, 0x2B, 0x03])),  # POWER SETTING
+            (0x06, bytes([0x17, 0x17, 0x17])),  # boost soft start A, B, C
+        )
+        self.panel_registers = (
+            (0x00, bytes([0xBF, 0x0D])),  # panel setting: LUT from register, VCOM to 0V fast
+            (0x30, bytes([0x3A])),  # PLL setting: 3a 100HZ   29 150Hz 39 200HZ	31 171HZ
+            (0x61, bytes([self.width, (self.height >> 8) & 0xFF, self.height & 0xFF])),  # resolution setting
+            (0x82, bytes([0x28])),  # vcom_DC setting
+        )
+
+    lut_vcomDC = bytes.fromhex(
+        "00 08 00 00 00 02 "
+        "60 28 28 00 00 01 "
+        "00 14 00 00 00 01 "
+        "00 12 12 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00"
+    )
+
+    lut_ww = bytes.fromhex(
+        "40 08 00 00 00 02 "
+        "90 28 28 00 00 01 "
+        "40 14 00 00 00 01 "
+        "A0 12 12 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_bw = bytes.fromhex(
+        "40 17 00 00 00 02 "
+        "90 0F 0F 00 00 03 "
+        "40 0A 01 00 00 01 "
+        "A0 0E 0E 00 00 02 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_wb = bytes.fromhex(
+        "80 08 00 00 00 02 "
+        "90 28 28 00 00 01 "
+        "80 14 00 00 00 01 "
+        "50 12 12 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_bb = bytes.fromhex(
+        "80 08 00 00 00 02 "
+        "90 28 28 00 00 01 "
+        "80 14 00 00 00 01 "
+        "50 12 12 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_vcom1 = bytes.fromhex(
+        "00 19 01 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00"
+    )
+
+    lut_ww1 = bytes.fromhex(
+        "00 19 01 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_bw1 = bytes.fromhex(
+        "80 19 01 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_wb1 = bytes.fromhex(
+        "40 19 01 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
+
+    lut_bb1 = bytes.fromhex(
+        "00 19 01 00 00 01 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00 "
+        "00 00 00 00 00 00"
+    )
 
     # Hardware reset
-    def reset(self):
+    def reset(self, settle_ms=200):
+        self.loaded_lut = None
+        self.partial_mode = False
         epdconfig.digital_write(self.reset_pin, 1)
-        epdconfig.delay_ms(200)
+        epdconfig.delay_ms(settle_ms)
         epdconfig.digital_write(self.reset_pin, 0)
         epdconfig.delay_ms(5)
         epdconfig.digital_write(self.reset_pin, 1)
-        epdconfig.delay_ms(200)
+        epdconfig.delay_ms(settle_ms)
 
     def send_command(self, command):
+        # the controller ignores anything sent mid-refresh, finish the pending one first
+        if self.refreshing:
+            self.ReadBusy()
         epdconfig.digital_write(self.dc_pin, 0)
         epdconfig.digital_write(self.cs_pin, 0)
         epdconfig.spi_writebyte([command])
@@ -523,124 +228,158 @@ class EPD:
         epdconfig.spi_writebyte([data])
         epdconfig.digital_write(self.cs_pin, 1)
 
-    def ReadBusy(self):
-        logging.debug("e-Paper busy")
-        while epdconfig.digital_read(self.busy_pin) == 0:  # 0: idle, 1: busy
-            self.send_command(0x71)
-            epdconfig.delay_ms(100)
-        logging.debug("e-Paper busy release")
+    # send a whole block of data with DC/CS toggled once per burst
+    def send_data_bulk(self, data):
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        view = memoryview(data)
+        epdconfig.digital_write(self.dc_pin, 1)
+        epdconfig.digital_write(self.cs_pin, 0)
+        for offset in range(0, len(view), SPI_CHUNK_SIZE):
+            epdconfig.spi_writebyte2(view[offset : offset + SPI_CHUNK_SIZE])
+        epdconfig.digital_write(self.cs_pin, 1)
 
-    def TurnOnDisplay(self):
+    # Wait for BUSY to release and return how long the controller stayed busy (ms).
+    # With timeout_ms only wait that long: if the refresh is still running, refreshing
+    # stays set and None is returned, so the caller can do something else and wait again.
+    def ReadBusy(self, timeout_ms=None):
+        logging.debug("e-Paper busy")
+        self.refreshing = False
+        self.send_command(0x71)
+        # BUSY_N is active low: the pin reads 1 once the controller is idle
+        limit_ms = self.busy_timeout_ms - self.busy_waited_ms
+        wait_ms = limit_ms if timeout_ms is None else min(timeout_ms, limit_ms)
+        waited_ms = epdconfig.wait_for_idle(self.busy_pin, 1, wait_ms, self.busy_poll_ms)
+        self.busy_waited_ms += waited_ms
+        if waited_ms >= wait_ms and wait_ms < limit_ms:
+            self.refreshing = True
+            return None
+        busy_ms, self.busy_waited_ms = self.busy_waited_ms, 0.0
+        self.last_busy_ms = busy_ms
+        if busy_ms >= self.busy_timeout_ms:
+            logging.warning("e-Paper still busy after %d ms, giving up", busy_ms)
+        else:
+            logging.debug("e-Paper busy release after %d ms", busy_ms)
+        return busy_ms
+
+    # Start the refresh. With wait=False return right away and leave it to the caller
+    # (or the next command) to wait for BUSY, so the CPU is free while the glass updates
+    def TurnOnDisplay(self, wait=True):
         self.send_command(0x12)
         epdconfig.delay_ms(100)
-        self.ReadBusy()
+        if wait:
+            self.ReadBusy()
+        else:
+            self.refreshing = True
 
     def init(self):
         if epdconfig.module_init() != 0:
             return -1
         # EPD hardware init start
         self.reset()
+        self.load_registers()
+        return 0
 
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data(0x03)
-        self.send_data(0x00)
-        self.send_data(0x2B)
-        self.send_data(0x2B)
-        self.send_data(0x03)
-
-        self.send_command(0x06)  # boost soft start
-        self.send_data(0x17)  # A
-        self.send_data(0x17)  # B
-        self.send_data(0x17)  # C
-
-        self.send_command(0x04)
-        self.ReadBusy()
+    # Bring the controller back from deep sleep. The glass keeps its image, so only a
+    # short reset pulse and a replay of the cached power-up registers are needed.
+    # RAM is lost in deep sleep: the old plane is restored to what Clear() leaves there.
+    def wake(self):
+        if epdconfig.module_init() != 0:
+            return -1
+        self.reset(WAKE_RESET_MS)
+        self.load_registers()
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xBF)  # LUT from OTP,128x296
-        self.send_data(0x0D)  # VCOM to 0V fast
+        self.send_command(0x10)
+        self.send_data_bulk(self.black_frame)
+        return 0
 
-        self.send_command(0x30)  # PLL setting
-        self.send_data(0x3A)  # 3a 100HZ   29 150Hz 39 200HZ	31 171HZ
+    def load_registers(self):
+        for command, data in self.power_registers:
+            self.send_command(command)
+            self.send_data_bulk(data)
 
-        self.send_command(0x61)  # resolution setting
-        self.send_data(self.width)
-        self.send_data((self.height >> 8) & 0xFF)
-        self.send_data(self.height & 0xFF)
+        self.send_command(0x04)  # power on
+        self.ReadBusy()
 
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data(0x28)
-        return 0
+        for command, data in self.panel_registers:
+            self.send_command(command)
+            self.send_data_bulk(data)
+        self.loaded_lut = None
 
     def SetFullReg(self):
+        if self.loaded_lut == FULL_REFRESH:
+            return
+
         self.send_command(0x82)
         self.send_data(0x00)
         self.send_command(0x50)
         self.send_data(0x97)
 
         self.send_command(0x20)  # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcomDC[count])
+        self.send_data_bulk(self.lut_vcomDC)
         self.send_command(0x21)  # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
+        self.send_data_bulk(self.lut_ww)
         self.send_command(0x22)  # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
+        self.send_data_bulk(self.lut_bw)
         self.send_command(0x23)  # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
+        self.send_data_bulk(self.lut_wb)
         self.send_command(0x24)  # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
+        self.send_data_bulk(self.lut_bb)
+        self.loaded_lut = FULL_REFRESH
 
     def SetPartReg(self):
+        if self.loaded_lut == PARTIAL_REFRESH:
+            return
+
         self.send_command(0x82)
         self.send_data(0x03)
         self.send_command(0x50)
         self.send_data(0x47)
 
         self.send_command(0x20)  # vcom
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom1[count])
+        self.send_data_bulk(self.lut_vcom1)
         self.send_command(0x21)  # ww --
-        for count in range(0, 42):
-            self.send_data(self.lut_ww1[count])
+        self.send_data_bulk(self.lut_ww1)
         self.send_command(0x22)  # bw r
-        for count in range(0, 42):
-            self.send_data(self.lut_bw1[count])
+        self.send_data_bulk(self.lut_bw1)
         self.send_command(0x23)  # wb w
-        for count in range(0, 42):
-            self.send_data(self.lut_wb1[count])
+        self.send_data_bulk(self.lut_wb1)
         self.send_command(0x24)  # bb b
-        for count in range(0, 42):
-            self.send_data(self.lut_bb1[count])
-
-    def getbuffer(self, image):
-        # logging.debug("bufsiz = ",int(self.width/8) * self.height)
-        buf = [0xFF] * (int(self.width / 8) * self.height)
+        self.send_data_bulk(self.lut_bb1)
+        self.loaded_lut = PARTIAL_REFRESH
+
+    # Pack an image into the controller's 1bpp layout (MSB first, 1 = white).
+    # PIL's mode "1" raw encoding already is exactly that layout since the panel
+    # width is a multiple of 8, so the packing happens in C instead of per pixel.
+    # With rotate=True the plane is turned by 180 degrees after packing: reversing the
+    # byte order and mirroring the bits of every byte moves pixel (x, y) to
+    # (width - x - 1, height - y - 1) without touching the image
+    def getbuffer(self, image, rotate=False):
         image_monocolor = image.convert("1")
         imwidth, imheight = image_monocolor.size
-        pixels = image_monocolor.load()
-        # logging.debug("imwidth = %d, imheight = %d",imwidth,imheight)
         if imwidth == self.width and imheight == self.height:
             logging.debug("Vertical")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    # Set the bits for the column of pixels at the current position.
-                    if pixels[x, y] == 0:
-                        buf[int((x + y * self.width) / 8)] &= ~(0x80 >> (x % 8))
+            buf = bytearray(image_monocolor.tobytes())
         elif imwidth == self.height and imheight == self.width:
             logging.debug("Horizontal")
-            for y in range(imheight):
-                for x in range(imwidth):
-                    newx = y
-                    newy = self.height - x - 1
-                    if pixels[x, y] == 0:
-                        buf[int((newx + newy * self.width) / 8)] &= ~(0x80 >> (y % 8))
+            # pixel (x, y) goes to (y, height - x - 1): a 90 degree counterclockwise turn
+            buf = bytearray(image_monocolor.transpose(Image.ROTATE_90).tobytes())
+        else:
+            return bytearray(self.white_frame)
+
+        if rotate:
+            buf.reverse()
+            buf = bytearray(buf.translate(REVERSE_TABLE))
         return buf
 
-    def display(self, image):
+    # Map a window (inclusive byte columns and rows) onto a plane turned by 180 degrees
+    def rotate_window(self, window):
+        x_start, x_end, y_start, y_end = window
+        last_column = self.line_width - 1
+        last_row = self.height - 1
+        return last_column - x_end, last_column - x_start, last_row - y_end, last_row - y_start
+
+    def display(self, image, wait=True):
         if Image == None:
             return
 
@@ -650,57 +389,110 @@ class EPD:
         #     self.send_data(0x00)
         # epdconfig.delay_ms(10)
 
+        self.PartialOut()
         self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(image[i])
+        self.send_data_bulk(image)
         epdconfig.delay_ms(10)
+        self.frame = bytes(image[: self.frame_size])
 
         self.SetFullReg()
-        self.TurnOnDisplay()
-
-    def DisplayPartial(self, image):
+        self.TurnOnDisplay(wait)
+
+    # Find the smallest window (inclusive byte columns and rows) that covers every
+    # byte differing between two planes. Byte columns keep the window snapped to the
+    # 8 px granularity of the controller's horizontal window registers.
+    # A hint window limits the search, the caller guarantees nothing changed outside of it.
+    def get_dirty_window(self, old_plane, new_plane, hint=None):
+        last_column = self.line_width - 1
+        if old_plane is None:
+            return 0, last_column, 0, self.height - 1
+
+        x_first, x_last, y_first, y_last = hint if hint is not None else (0, last_column, 0, self.height - 1)
+
+        def row(plane, y):
+            return plane[y * self.line_width + x_first : y * self.line_width + x_last + 1]
+
+        dirty_rows = [y for y in range(y_first, y_last + 1) if row(old_plane, y) != row(new_plane, y)]
+        if not dirty_rows:
+            return None
+
+        y_start, y_end = dirty_rows[0], dirty_rows[-1]
+        mask = 0
+        for y in dirty_rows:
+            mask |= int.from_bytes(row(old_plane, y), "big") ^ int.from_bytes(row(new_plane, y), "big")
+
+        # the first byte of a row is the most significant one in the mask
+        x_start = x_last - (mask.bit_length() - 1) // 8
+        x_end = x_last - ((mask & -mask).bit_length() - 1) // 8
+        return x_start, x_end, y_start, y_end
+
+    # Cut the bytes covered by a window out of a full plane, row by row
+    def crop_window(self, plane, window):
+        x_start, x_end, y_start, y_end = window
+        return b"".join(
+            plane[y * self.line_width + x_start : y * self.line_width + x_end + 1] for y in range(y_start, y_end + 1)
+        )
+
+    def DisplayPartial(self, image, wait=True, hint=None):
         if Image == None:
             return
 
+        plane = bytes(image[: self.frame_size])
+        window = self.get_dirty_window(self.frame, plane, hint)
+        if window is None:
+            logging.debug("Frame unchanged, partial refresh skipped")
+            return
+
+        x_start, x_end, y_start, y_end = window
+        logging.debug("Partial window: bytes %d-%d, rows %d-%d", x_start, x_end, y_start, y_end)
+
         self.send_command(0x91)
+        self.partial_mode = True
         self.send_command(0x90)
-        self.send_data(0)
-        self.send_data(self.width - 1)
+        self.send_data(x_start * 8)
+        self.send_data(x_end * 8 + 7)
 
-        self.send_data(0)
-        self.send_data(0)
-        self.send_data(int(self.height / 256))
-        self.send_data(self.height % 256 - 1)
+        self.send_data(y_start >> 8)
+        self.send_data(y_start & 0xFF)
+        self.send_data(y_end >> 8)
+        self.send_data(y_end & 0xFF)
         self.send_data(0x28)
 
+        region = self.crop_window(plane, window)
         self.send_command(0x10)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(image[i])
+        self.send_data_bulk(region)
         epdconfig.delay_ms(10)
 
         self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(~image[i])
+        self.send_data_bulk(region.translate(INVERT_TABLE))
         epdconfig.delay_ms(10)
+        self.frame = plane
 
         self.SetPartReg()
-        self.TurnOnDisplay()
+        self.TurnOnDisplay(wait)
+
+    # Leave partial mode, otherwise a full refresh only covers the last partial window
+    def PartialOut(self):
+        if self.partial_mode:
+            self.send_command(0x92)
+            self.partial_mode = False
 
-    def Clear(self, color):
+    def Clear(self, color, wait=True):
+        self.PartialOut()
         self.send_command(0x10)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(0x00)
+        self.send_data_bulk(self.black_frame)
         epdconfig.delay_ms(10)
 
         self.send_command(0x13)
-        for i in range(0, int(self.width * self.height / 8)):
-            self.send_data(0xFF)
+        self.send_data_bulk(self.white_frame)
         epdconfig.delay_ms(10)
+        self.frame = self.white_frame
 
         self.SetFullReg()
-        self.TurnOnDisplay()
+        self.TurnOnDisplay(wait)
 
     def sleep(self):
+        self.loaded_lut = None
         self.send_command(0x50)
         self.send_data(0xF7)
         self.send_command(0x02)  # power off
@@ -28,8 +28,10 @@
 #
 
 import logging
+import os
 import sys
 import time
+from collections import deque
 
 
 class RaspberryPi:
@@ -61,6 +63,24 @@ class RaspberryPi:
     def spi_writebyte2(self, data):
         self.SPI.writebytes2(data)
 
+    # Block until `pin` reads `idle_level` and return how long it stayed busy (ms).
+    # Sleeps on the GPIO edge, but re-reads the pin at least every `poll_ms` in case
+    # the edge fired before the detector was armed. Gives up after `timeout_ms`.
+    def wait_for_idle(self, pin, idle_level, timeout_ms, poll_ms):
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000.0
+        edge = self.GPIO.RISING if idle_level else self.GPIO.FALLING
+        while self.GPIO.input(pin) != idle_level:
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            if remaining_ms <= 0:
+                break
+            try:
+                self.GPIO.wait_for_edge(pin, edge, timeout=min(poll_ms, int(remaining_ms) + 1))
+            except RuntimeError:
+                # edge detection is unavailable or already taken on this pin
+                self.delay_ms(poll_ms)
+        return (time.monotonic() - start) * 1000.0
+
     def module_init(self):
         self.GPIO.setmode(self.GPIO.BCM)
         self.GPIO.setwarnings(False)
@@ -86,7 +106,236 @@ class RaspberryPi:
         self.GPIO.cleanup()
 
 
-implementation = RaspberryPi()
+class FakeBoard:
+    """
+    GPIO/SPI stand-in for running the driver without hardware.
+    Busy periods reported by wait_for_idle() are scripted with script_busy(),
+    a period longer than a wait carries over to the next one
+    """
+
+    # Pin definition
+    RST_PIN = 17
+    DC_PIN = 25
+    CS_PIN = 8
+    BUSY_PIN = 24
+
+    def __init__(self, time_scale=0.0):
+        self.time_scale = time_scale  # 0 reports scripted durations without actually waiting
+        self.busy_script = deque()
+        self.pins = {}
+
+    def script_busy(self, *durations_ms):
+        self.busy_script.extend(durations_ms)
+
+    def digital_write(self, pin, value):
+        self.pins[pin] = value
+
+    def digital_read(self, pin):
+        return self.pins.get(pin, 1)
+
+    def delay_ms(self, delaytime):
+        time.sleep(delaytime * self.time_scale / 1000.0)
+
+    def spi_writebyte(self, data):
+        pass
+
+    def spi_writebyte2(self, data):
+        pass
+
+    def wait_for_idle(self, pin, idle_level, timeout_ms, poll_ms):
+        busy_ms = self.busy_script.popleft() if self.busy_script else 0
+        if busy_ms > timeout_ms:
+            # the rest of the busy period is left for the next wait
+            self.busy_script.appendleft(busy_ms - timeout_ms)
+            busy_ms = timeout_ms
+        time.sleep(busy_ms * self.time_scale / 1000.0)
+        return float(busy_ms)
+
+    def module_init(self):
+        return 0
+
+    def module_exit(self):
+        logging.debug("fake board released")
+
+
+class SimulatedBoard(FakeBoard):
+    """
+    In-memory model of the e-Paper controller for running the driver off the Pi.
+    SPI traffic is decoded into the controller RAM planes and a framebuffer of what
+    the glass shows, BUSY periods follow the uploaded waveforms and the PLL rate
+    """
+
+    SPI_HZ = 4000000
+    SPI_TRANSFER_OVERHEAD_MS = 0.05  # CS/DC toggles and the ioctl of a single transfer
+    POWER_ON_MS = 80
+    OTP_REFRESH_MS = 2000  # used while no waveform set has been uploaded
+    FRAME_RATES = {0x29: 150, 0x31: 171, 0x39: 200, 0x3A: 100}  # PLL setting -> Hz
+
+    def __init__(self, width=104, height=212, time_scale=1.0):
+        super().__init__(time_scale)
+        self.width = width
+        self.height = height
+        self.line_width = width // 8
+        self.glass = bytearray([0xFF]) * (self.line_width * height)
+        self.refreshes = []
+        self.spi_bytes = 0
+        self.spi_transfers = 0
+        self.spi_time_ms = 0.0
+        self.busy_ms = 0.0
+        self.busy_since = 0.0
+        self._reset_controller()
+
+    def _reset_controller(self):
+        self.asleep = False
+        self.command = None
+        self.params = bytearray()
+        self.partial = False
+        self.window = self._full_window()
+        self.ram = {plane: bytearray([0xFF]) * len(self.glass) for plane in (0x10, 0x13)}
+        self.ram_pointer = 0
+        self.frame_rate = 100
+        self.luts = {}
+
+    def _full_window(self):
+        return 0, self.line_width - 1, 0, self.height - 1
+
+    def _active_window(self):
+        return self.window if self.partial else self._full_window()
+
+    def digital_write(self, pin, value):
+        if pin == self.RST_PIN and value == 0:
+            self._reset_controller()
+        super().digital_write(pin, value)
+
+    def digital_read(self, pin):
+        if pin == self.BUSY_PIN:
+            return 0 if self._busy_remaining_ms() > 0 else 1
+        return super().digital_read(pin)
+
+    def spi_writebyte(self, data):
+        self._transfer(bytes(x & 0xFF for x in data))
+
+    def spi_writebyte2(self, data):
+        self._transfer(bytes(data))
+
+    def wait_for_idle(self, pin, idle_level, timeout_ms, poll_ms):
+        busy_ms = min(self._busy_remaining_ms(), timeout_ms)
+        time.sleep(busy_ms * self.time_scale / 1000.0)
+        if busy_ms < timeout_ms:
+            self.busy_ms = 0.0
+        elif self.time_scale <= 0:
+            # without real waits the modeled time only passes while the driver waits
+            self.busy_ms -= busy_ms
+        return busy_ms
+
+    def frame_image(self):
+        """what the glass currently shows as a mode "1" image"""
+        from PIL import Image
+
+        return Image.frombytes("1", (self.width, self.height), bytes(self.glass))
+
+    def _busy_remaining_ms(self):
+        if self.time_scale <= 0:
+            return self.busy_ms
+        elapsed_ms = (time.monotonic() - self.busy_since) * 1000.0 / self.time_scale
+        return max(0.0, self.busy_ms - elapsed_ms)
+
+    def _set_busy(self, busy_ms):
+        self.busy_ms = busy_ms
+        self.busy_since = time.monotonic()
+
+    def _transfer(self, data):
+        transfer_ms = len(data) * 8 * 1000.0 / self.SPI_HZ + self.SPI_TRANSFER_OVERHEAD_MS
+        self.spi_bytes += len(data)
+        self.spi_transfers += 1
+        self.spi_time_ms += transfer_ms
+        time.sleep(transfer_ms * self.time_scale / 1000.0)
+
+        if self.asleep:
+            return  # only a hardware reset wakes the controller up
+        if self.pins.get(self.DC_PIN, 0) == 0:
+            for command in data:
+                self._on_command(command)
+        else:
+            self._on_data(data)
+
+    def _on_command(self, command):
+        self.command = command
+        self.params = bytearray()
+        if command in (0x10, 0x13):  # data start transmission 1 / 2
+            self.ram_pointer = 0
+        elif command == 0x91:  # partial in
+            self.partial = True
+        elif command == 0x92:  # partial out
+            self.partial = False
+        elif command == 0x04:  # power on
+            self._set_busy(self.POWER_ON_MS)
+        elif command == 0x12:  # display refresh
+            self._refresh()
+
+    def _on_data(self, data):
+        command = self.command
+        if command in (0x10, 0x13):
+            self._write_ram(self.ram[command], data)
+            return
+
+        self.params += data
+        params = self.params
+        if command == 0x90 and len(params) == 7:  # partial window, horizontal bounds in 8 px units
+            self.window = params[0] >> 3, params[1] >> 3, params[2] << 8 | params[3], params[4] << 8 | params[5]
+        elif command == 0x30 and len(params) == 1:  # PLL control
+            self.frame_rate = self.FRAME_RATES.get(params[0], 100)
+        elif 0x20 <= command <= 0x24:  # waveform LUTs
+            self.luts[command] = bytes(params)
+        elif command == 0x07 and params[0] == 0xA5:  # deep sleep
+            self.asleep = True
+
+    def _write_ram(self, plane, data):
+        x_start, x_end, y_start, y_end = self._active_window()
+        window_width = x_end - x_start + 1
+        for byte in data:
+            row = y_start + self.ram_pointer // window_width
+            if row > y_end:
+                break
+            plane[row * self.line_width + x_start + self.ram_pointer % window_width] = byte
+            self.ram_pointer += 1
+
+    def _refresh(self):
+        mode = "partial" if self.partial else "full"
+        x_start, x_end, y_start, y_end = window = self._active_window()
+        # the driver loads its partial waveforms so that the "old" (0x10) plane ends up on the glass
+        source = self.ram[0x10 if self.partial else 0x13]
+        for row in range(y_start, y_end + 1):
+            offset = row * self.line_width
+            self.glass[offset + x_start : offset + x_end + 1] = source[offset + x_start : offset + x_end + 1]
+
+        refresh_ms = self._waveform_ms()
+        self.refreshes.append({"mode": mode, "window": window, "duration_ms": refresh_ms})
+        self._set_busy(refresh_ms)
+
+    def _waveform_ms(self):
+        """length of the loaded VCOM waveform: phases of 4 frame counts and a repeat count"""
+        lut = self.luts.get(0x20)
+        if not lut:
+            return float(self.OTP_REFRESH_MS)
+        phases = [lut[i : i + 6] for i in range(0, len(lut) - 5, 6)]
+        frames = sum(sum(phase[1:5]) * phase[5] for phase in phases)
+        return frames * 1000.0 / self.frame_rate
+
+
+def set_implementation(new_implementation):
+    """expose the methods of a board implementation as this module's functions"""
+    global implementation
+    implementation = new_implementation
+    for func in [x for x in dir(implementation) if not x.startswith("_")]:
+        setattr(sys.modules[__name__], func, getattr(implementation, func))
+
+
+# the board is picked with FEECC_EPD_BACKEND, the simulated one can run faster than real time
+# by setting FEECC_EPD_TIME_SCALE (0 models all the timings without waiting for any of them)
+BACKENDS = {"rpi": RaspberryPi, "fake": FakeBoard, "simulated": SimulatedBoard}
+
+set_implementation(BACKENDS[os.environ.get("FEECC_EPD_BACKEND", "rpi")]())
 
-for func in [x for x in dir(implementation) if not x.startswith("_")]:
-    setattr(sys.modules[__name__], func, getattr(implementation, func))
+if "FEECC_EPD_TIME_SCALE" in os.environ:
+    implementation.time_scale = float(os.environ["FEECC_EPD_TIME_SCALE"])
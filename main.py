@@ -1,6 +1,7 @@
 import atexit
+import typing as tp
 
-from flask import Flask, request
+from flask import Flask, Response, request
 from flask_restful import Api, Resource
 from loguru import logger
 
@@ -57,7 +58,39 @@ class HidEventHandler(Resource):
             return {"status": False, "comment": f"operation is forbidden by the state: {E}"}
 
 
+class OutboxHandler(Resource):
+    """Reports the requests waiting to be delivered to the hub"""
+
+    @staticmethod
+    def get() -> RequestPayload:
+        return Spoke().outbox.status()
+
+
+class DisplayHandler(Resource):
+    """Reports the metrics of the display pipeline"""
+
+    @staticmethod
+    def get() -> RequestPayload:
+        return Display().status()
+
+
+class DisplayFrameHandler(Resource):
+    """Serves a frame kept in memory by the display as a PBM image, the frames are listed by DisplayHandler"""
+
+    @staticmethod
+    def get(index: int) -> Response:
+        frame: tp.Optional[bytes] = Display().recent_frame(index)
+
+        if frame is None:
+            return Response(f"no frame {index} in memory", status=404, mimetype="text/plain")
+
+        return Response(frame, mimetype="image/x-portable-bitmap")
+
+
 api.add_resource(HidEventHandler, "/api/hid_event")
+api.add_resource(OutboxHandler, "/api/outbox")
+api.add_resource(DisplayHandler, "/api/display")
+api.add_resource(DisplayFrameHandler, "/api/display/frames/<int:index>")
 
 # daemon initialization
 if __name__ == "__main__":
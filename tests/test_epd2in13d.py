@@ -0,0 +1,120 @@
+"""the driver run against the boards that stand in for the hardware"""
+
+import logging
+import os
+import typing as tp
+
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+os.environ.setdefault("FEECC_EPD_BACKEND", "fake")
+
+from feecc_spoke.waveshare_epd import epd2in13d, epdconfig  # noqa: E402
+
+PROJECT_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_PATH: str = os.path.join(PROJECT_ROOT, "feecc_spoke", "fonts", "helvetica-cyrillic-bold.ttf")
+BUSY_TIMEOUT_MS: int = 500
+
+
+@pytest.fixture
+def fake_board() -> tp.Iterator[epdconfig.FakeBoard]:
+    previous = epdconfig.implementation
+    board = epdconfig.FakeBoard()
+    epdconfig.set_implementation(board)
+    yield board
+    epdconfig.set_implementation(previous)
+
+
+@pytest.fixture
+def simulated_board() -> tp.Iterator[epdconfig.SimulatedBoard]:
+    previous = epdconfig.implementation
+    board = epdconfig.SimulatedBoard(time_scale=0)
+    epdconfig.set_implementation(board)
+    yield board
+    epdconfig.set_implementation(previous)
+
+
+def draw_timer(reading: str) -> Image.Image:
+    """a landscape frame with a timer reading, like the one of the assembly timer screen"""
+    image = Image.new("1", (epd2in13d.EPD_HEIGHT, epd2in13d.EPD_WIDTH), 255)
+    ImageDraw.Draw(image).text((30, 30), reading, font=ImageFont.truetype(FONT_PATH, 36), fill=0)
+    return image
+
+
+def expected_window(before: Image.Image, after: Image.Image) -> tp.Tuple[int, int, int, int]:
+    """the pixels that differ between two landscape frames as a window of the portrait panel, in whole bytes"""
+    bbox = ImageChops.difference(before, after).getbbox()
+    assert bbox is not None
+    left, top, right, bottom = bbox
+    return top // 8, (bottom - 1) // 8, epd2in13d.EPD_HEIGHT - right, epd2in13d.EPD_HEIGHT - 1 - left
+
+
+def test_read_busy_returns_when_busy_releases(fake_board: epdconfig.FakeBoard) -> None:
+    epd = epd2in13d.EPD(busy_timeout_ms=BUSY_TIMEOUT_MS)
+    fake_board.script_busy(120)
+
+    assert epd.ReadBusy() == 120
+    assert epd.last_busy_ms == 120
+
+
+def test_read_busy_times_out_when_busy_never_releases(
+    fake_board: epdconfig.FakeBoard, caplog: pytest.LogCaptureFixture
+) -> None:
+    epd = epd2in13d.EPD(busy_timeout_ms=BUSY_TIMEOUT_MS)
+    fake_board.script_busy(10**9)
+
+    with caplog.at_level(logging.WARNING):
+        assert epd.ReadBusy() == BUSY_TIMEOUT_MS
+
+    assert "giving up" in caplog.text
+    assert not epd.refreshing
+
+
+def test_sliced_busy_wait_gives_up_after_the_whole_timeout(fake_board: epdconfig.FakeBoard) -> None:
+    epd = epd2in13d.EPD(busy_timeout_ms=BUSY_TIMEOUT_MS)
+    fake_board.script_busy(10**9)
+    epd.refreshing = True
+    slices: tp.List[tp.Optional[float]] = []
+
+    while epd.refreshing:
+        slices.append(epd.ReadBusy(50))
+
+    assert slices == [None] * 9 + [BUSY_TIMEOUT_MS]
+
+
+def test_timer_partial_refresh_touches_only_the_changed_digits(simulated_board: epdconfig.SimulatedBoard) -> None:
+    epd = epd2in13d.EPD()
+    epd.init()
+    before, after = draw_timer("00:00:09"), draw_timer("00:00:10")
+    epd.display(epd.getbuffer(before))
+    sent_before: int = simulated_board.spi_bytes
+
+    epd.DisplayPartial(epd.getbuffer(after))
+
+    refresh = simulated_board.refreshes[-1]
+    assert refresh["mode"] == "partial"
+    assert refresh["window"] == expected_window(before, after)
+    assert simulated_board.spi_bytes - sent_before < epd.frame_size
+    assert bytes(simulated_board.glass) == bytes(epd.getbuffer(after))
+
+
+def test_glass_survives_sleep_and_wake(simulated_board: epdconfig.SimulatedBoard) -> None:
+    epd = epd2in13d.EPD()
+    epd.init()
+    first, second = draw_timer("00:00:09"), draw_timer("00:00:10")
+    epd.display(epd.getbuffer(first))
+
+    epd.sleep()
+    assert simulated_board.asleep
+    epd.wake()
+
+    assert not simulated_board.asleep
+    assert bytes(simulated_board.glass) == bytes(epd.getbuffer(first))
+
+    # the controller RAM is lost in deep sleep, the next frames have to come out right regardless
+    epd.DisplayPartial(epd.getbuffer(second))
+    assert bytes(simulated_board.glass) == bytes(epd.getbuffer(second))
+
+    epd.display(epd.getbuffer(first))
+    assert simulated_board.refreshes[-1]["mode"] == "full"
+    assert bytes(simulated_board.glass) == bytes(epd.getbuffer(first))
@@ -0,0 +1,117 @@
+"""packed frames must be bit-identical to the ones of the original per-pixel packing loop"""
+
+import inspect
+import os
+import random
+import types
+import typing as tp
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+os.environ.setdefault("FEECC_EPD_BACKEND", "fake")
+
+from feecc_spoke import Alerts, Views  # noqa: E402
+from feecc_spoke.Employee import Employee  # noqa: E402
+from feecc_spoke.ViewBase import Alert, View  # noqa: E402
+from feecc_spoke.waveshare_epd import epd2in13d  # noqa: E402
+
+if tp.TYPE_CHECKING:
+    from feecc_spoke.Display import Display
+
+PROJECT_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_PATH: str = os.path.join(PROJECT_ROOT, "feecc_spoke", "fonts", "helvetica-cyrillic-bold.ttf")
+LANDSCAPE: tp.Tuple[int, int] = (epd2in13d.EPD_HEIGHT, epd2in13d.EPD_WIDTH)
+PORTRAIT: tp.Tuple[int, int] = (epd2in13d.EPD_WIDTH, epd2in13d.EPD_HEIGHT)
+
+
+def reference_getbuffer(epd: epd2in13d.EPD, image: Image.Image) -> bytes:
+    """the per-pixel packing loop getbuffer used to run"""
+    buf = [0xFF] * (int(epd.width / 8) * epd.height)
+    image_monocolor = image.convert("1")
+    imwidth, imheight = image_monocolor.size
+    pixels = image_monocolor.load()
+    if imwidth == epd.width and imheight == epd.height:
+        for y in range(imheight):
+            for x in range(imwidth):
+                # Set the bits for the column of pixels at the current position.
+                if pixels[x, y] == 0:
+                    buf[int((x + y * epd.width) / 8)] &= ~(0x80 >> (x % 8))
+    elif imwidth == epd.height and imheight == epd.width:
+        for y in range(imheight):
+            for x in range(imwidth):
+                newx = y
+                newy = epd.height - x - 1
+                if pixels[x, y] == 0:
+                    buf[int((newx + newy * epd.width) / 8)] &= ~(0x80 >> (y % 8))
+    return bytes(buf)
+
+
+def sample_images(size: tp.Tuple[int, int]) -> tp.List[Image.Image]:
+    """random noise to catch any misplaced bit and a grayscale text frame like the ones views draw"""
+    width, height = size
+    noise = Image.frombytes("1", size, random.Random(width).randbytes((width + 7) // 8 * height))
+    text = Image.new("L", size, 255)
+    ImageDraw.Draw(text).text((8, 8), "Сессия 00:01", font=ImageFont.truetype(FONT_PATH, 14), fill=96)
+    return [noise, text]
+
+
+@pytest.mark.parametrize("size", [LANDSCAPE, PORTRAIT], ids=["landscape", "portrait"])
+def test_getbuffer_of_samples_matches_reference(size: tp.Tuple[int, int]) -> None:
+    epd = epd2in13d.EPD()
+
+    for image in sample_images(size):
+        assert bytes(epd.getbuffer(image)) == reference_getbuffer(epd, image)
+
+
+def test_getbuffer_of_a_mismatched_image_is_blank() -> None:
+    epd = epd2in13d.EPD()
+    image = Image.new("1", (epd.width, epd.width), 0)
+
+    assert bytes(epd.getbuffer(image)) == reference_getbuffer(epd, image) == b"\xff" * epd.frame_size
+
+
+def view_classes() -> tp.List[tp.Type[View]]:
+    """every concrete view of Views.py and Alerts.py"""
+    classes: tp.List[tp.Type[View]] = []
+
+    for module in (Views, Alerts):
+        for _, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, View) and cls is not Alert and cls.__module__ == module.__name__:
+                classes.append(cls)
+
+    return classes
+
+
+@pytest.fixture
+def context(monkeypatch: pytest.MonkeyPatch) -> types.SimpleNamespace:
+    """the parts of Display the views read"""
+    monkeypatch.chdir(PROJECT_ROOT)
+    spoke = types.SimpleNamespace(ipv4="192.168.88.101", operation_ongoing=False, operation_started_at=None)
+    return types.SimpleNamespace(
+        epd=epd2in13d.EPD(),
+        spoke_config={
+            "general": {"workbench_no": 2},
+            "screen": {"rotate_output": False, "timer_coarse_after": 3600},
+        },
+        associated_worker=Employee(is_authorized=True, full_name="Иванов Иван Иванович", position="Младший инженер"),
+        associated_spoke=spoke,
+    )
+
+
+@pytest.mark.parametrize("view_class", view_classes(), ids=lambda cls: cls.__name__)
+def test_getbuffer_matches_reference(view_class: tp.Type[View], context: types.SimpleNamespace) -> None:
+    epd: epd2in13d.EPD = context.epd
+    image: Image.Image = view_class(tp.cast("Display", context))._compose()
+
+    # landscape as the views draw it and portrait as the panel stores it
+    for frame in (image, image.transpose(Image.ROTATE_90)):
+        assert bytes(epd.getbuffer(frame)) == reference_getbuffer(epd, frame)
+
+    # rotated output used to be packed from the image turned by 180 degrees
+    assert bytes(epd.getbuffer(image, rotate=True)) == reference_getbuffer(epd, image.rotate(180))
+
+
+def test_getbuffer_covers_every_view() -> None:
+    names: tp.Set[str] = {cls.__name__ for cls in view_classes()}
+    assert {"LoginScreen", "OngoingOperationScreen", "BlankScreen", "ScanBarcodeAlert"} <= names